@@ -28,13 +28,16 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
+from __future__ import annotations
 
-from pandas import DataFrame
 import sys
+from typing import TYPE_CHECKING
 
-sys.path.append('..')
+if TYPE_CHECKING:
+    from pandas import DataFrame
 
-from src import DataEngineering, DataScience, PlotTimeSeries
+# sys.builtin_module_names is a tuple: use a set for constant-time membership checks
+_builtin_module_names = frozenset(sys.builtin_module_names)
 
 
 def plot_trends(df: DataFrame) -> None:
@@ -66,16 +69,25 @@ def plot_trends(df: DataFrame) -> None:
         plot_trends(polling_df)
         ```
     """
+    # Deferred import: matplotlib is only loaded when a plot is actually requested
+    import pandas as pd
+    from src import PlotTimeSeries
+
     plt_ts = PlotTimeSeries()
     fig, ax = plt_ts.get_panels()
 
-    for candidate in ['Bulstrode', 'Lydgate', 'Vincy', 'Casaubon', 'Chettam', 'Others']:
-        ax.plot(df['Date'], df[candidate], label=candidate)
+    candidates = ['Bulstrode', 'Lydgate', 'Vincy', 'Casaubon', 'Chettam', 'Others']
+
+    # Convert the dates once, so that Matplotlib does not repeat the conversion for every line
+    dates = pd.to_datetime(df['Date']).values
+
+    # Plot all candidates in one call over the (N, n_candidates) array, sharing the same x-data
+    lines = ax.plot(dates, df[candidates].values)
 
     plt_ts.set_title('Bulstrodites trending', subtitle='Fraction of candidate polling, %/100')
     plt_ts.set_source('Dataland political archive 2023-24', pad=0.15)
 
-    ax.legend(fontsize=10, loc='center left', frameon=True, framealpha=0.85)
+    ax.legend(lines, candidates, fontsize=10, loc='center left', frameon=True, framealpha=0.85)
     plt_ts.savefig('polling_trends.png', dpi=250)
 
 
@@ -84,12 +96,20 @@ def inspect_imported_modules() -> None:
     Lists the modules used that are not included in the standard library
     :return: None
     """
-    for i in sys.modules.keys():
-        if not i.startswith('_') and '.' not in i and i not in sys.builtin_module_names :
-            print(i)
+    third_party = [i for i in sys.modules.keys()
+                   if not i.startswith('_') and '.' not in i and i not in _builtin_module_names]
+    print('\n'.join(third_party))
 
 
 def main() -> int:
+    # The figures are only saved to file: select the non-interactive Agg backend once, before pyplot is imported, to
+    # avoid setting up a GUI
+    import matplotlib
+    matplotlib.use('Agg')
+
+    # Deferred import: the pandas-based pipelines are only loaded when running the analysis
+    from src import DataEngineering, DataScience
+
     # Run the data engineering pipeline to clean the raw inputs
     de = DataEngineering(reset=True)  # reset=True starts from scraping the URL, False uses locally saved data.
     print('\nA glimpse of the clean data:\n', de.data.head(10))
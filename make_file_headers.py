@@ -43,11 +43,13 @@ THE SOFTWARE.
 import sys
 import os
 import os.path as path
-import fileinput
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Tuple
 
 
 src_extensions: List[str] = ['.py', '.mplstyles']
+_src_extensions_tuple: Tuple[str, ...] = tuple(src_extensions)
 
 
 def is_src_file(file: str) -> bool:
@@ -60,8 +62,8 @@ def is_src_file(file: str) -> bool:
     :param file: File name (including extension) to be checked.
     :return: True if the file's extension is in `src_extensions`, False otherwise.
     """
-    results = [file.endswith(ext) for ext in src_extensions]
-    return True in results
+    # str.endswith accepts a tuple of suffixes and checks them all in a single call
+    return file.endswith(_src_extensions_tuple)
 
 
 def is_header_missing(file: str) -> bool:
@@ -75,16 +77,37 @@ def is_header_missing(file: str) -> bool:
     :param file: File path to be checked.
     :return: True if the file is missing a shebang header, False otherwise.
     """
-    with open(file) as reader:
-        lines = reader.read().lstrip().splitlines()
+    # Stream the file in binary mode and stop at the first non-blank line, instead of reading it all
+    with open(file, 'rb') as reader:
+        for line in reader:
+            line = line.lstrip()
 
-        if len(lines) > 0:
-            return not lines[0].startswith("#!")
+            if line:
+                return not line.startswith(b"#!")
 
         return True
 
 
-def get_src_files(dirname: str) -> List[str]:
+def walk_src_files(dirname: str) -> Iterator[str]:
+    """
+    Recursively yield the paths of source code files in a directory and its subdirectories.
+
+    This function uses `os.scandir`, whose entries carry the file type from the directory
+    listing itself, so no extra `stat` call is needed per entry. Paths are yielded as they
+    are found. Symbolic links to directories are not followed.
+
+    :param dirname: Directory path to start the search.
+    :return: Iterator over the paths of source code files.
+    """
+    with os.scandir(dirname) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk_src_files(entry.path)
+            elif entry.is_file() and is_src_file(entry.name):
+                yield entry.path
+
+
+def get_src_files(dirname: str, max_workers: int = 16) -> List[str]:
     """
     Find source code files in a directory and its subdirectories with missing headers.
 
@@ -93,13 +116,16 @@ def get_src_files(dirname: str) -> List[str]:
     a list of file paths for source code files that have missing headers.
 
     :param dirname: Directory path to start the search.
+    :param max_workers: Number of threads used to check the file headers concurrently.
     :return: List of file paths for source code files with missing headers.
     """
-    src_files = []
-    for cur, _dirs, files in os.walk(dirname):
-        [src_files.append(path.join(cur, file)) for file in files if is_src_file(file)]
+    src_files = list(walk_src_files(dirname))
 
-    return [file for file in src_files if is_header_missing(file)]
+    # Checking the headers is I/O bound, so overlap the file reads across threads
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        mask = list(executor.map(is_header_missing, src_files))
+
+    return [file for file, missing in zip(src_files, mask) if missing]
 
 
 def add_headers(files_target: List[str], header_file: str) -> None:
@@ -113,11 +139,13 @@ def add_headers(files_target: List[str], header_file: str) -> None:
     :param header_file: Header content to be added to the files.
     :return: None
     """
-    for line in fileinput.input(files_target, inplace=True):
-        if fileinput.isfirstline():
-            for h in header_file.splitlines():
-                print(h)
-        print(line, end="")
+    # Make sure the header is terminated, so the original first line is not glued onto it
+    header = header_file if header_file.endswith('\n') else header_file + '\n'
+
+    # Read each file in one go and write it back with the header prepended
+    for file in files_target:
+        src_path = Path(file)
+        src_path.write_text(header + src_path.read_text())
 
 
 if __name__ == "__main__":
@@ -144,7 +172,7 @@ if __name__ == "__main__":
 
     confirm = input("proceed ? [Y/n] ")
 
-    if confirm is not "Y":
+    if confirm.strip().upper() != "Y":
         exit(0)
 
     add_headers(files, header)
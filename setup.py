@@ -29,18 +29,69 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
+import ast
+import datetime
+import subprocess
 import setuptools
+from pathlib import Path
+from setuptools.command.build_py import build_py
+from setuptools.command.sdist import sdist
 
-with open("README.md", "r") as fh:
-    long_description = fh.read()
+long_description = Path("README.md").read_text()
 
-with open("src/__version__.py", "r") as fh:
-    exec_output = {}
-    exec(fh.read(), exec_output)
-    __version__ = exec_output["__version__"]
+# Parse the version assignment statically, without compiling and executing the file
+__version__ = next(
+    ast.literal_eval(node.value) for node in ast.walk(ast.parse(Path("src/__version__.py").read_text()))
+    if isinstance(node, ast.Assign)
+    and any(isinstance(target, ast.Name) and target.id == "__version__" for target in node.targets)
+)
+
+# Skip blank lines, which would otherwise be passed to setuptools as empty requirements
+required = [line for line in Path("requirements.txt").read_text().splitlines() if line.strip()]
+
+
+def write_last_commit_date(path: Path = Path("src/_last_commit.txt")) -> None:
+    """
+    Cache the date of last commit for `src.__cite__`, since the installed package has no git history to read it from.
+    Outside a git checkout (eg when building from an sdist), the file shipped with the sources is kept.
+
+    :param path: Path of the cache file, packaged as data of `src`.
+    :return: None
+    """
+    try:
+        timestamp = subprocess.run(["git", "log", "-1", "--format=%ct"],
+                                   capture_output=True, text=True, check=True).stdout.strip()
+        path.write_text(datetime.datetime.fromtimestamp(int(timestamp)).strftime("%Y-%m-%d"))
+
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        pass
+
+
+class BuildPyWithDate(build_py):
+    """
+    Build command that caches the date of last commit, for the installed package.
+    """
+
+    def run(self):
+        """
+        Writes the date of last commit to `src/_last_commit.txt`, then runs the build_py command.
+        """
+        write_last_commit_date()
+        super().run()
+
+
+class SdistWithDate(sdist):
+    """
+    Source distribution command that caches the date of last commit, for the installed package.
+    """
+
+    def run(self):
+        """
+        Writes the date of last commit to `src/_last_commit.txt`, then runs the sdist command.
+        """
+        write_last_commit_date()
+        super().run()
 
-with open("requirements.txt", "r") as f:
-    required = f.read().splitlines()
 
 setuptools.setup(
     name="election-predictions",
@@ -49,7 +100,8 @@ setuptools.setup(
     url="https://github.com/edoaltamura/election-predictions",
     author="Edoardo Altamura",
     author_email="edoardo.altamura@outlook.com",
-    packages=setuptools.find_packages(),
+    packages=["src"],
+    package_data={"src": ["mplstyles/*.mplstyle", "_last_commit.txt"]},
     long_description=long_description,
     long_description_content_type="text/markdown",
     zip_safe=False,
@@ -61,5 +113,5 @@ setuptools.setup(
         "Operating System :: OS Independent",
     ],
     install_requires=required,
-    include_package_data=True,
+    cmdclass={"build_py": BuildPyWithDate, "sdist": SdistWithDate},
 )
\ No newline at end of file
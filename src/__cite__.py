@@ -28,48 +28,93 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
+import sys
 import warnings
 import datetime
-import os.path
+from pathlib import Path
+from typing import Any
 
+from .__version__ import __version__
 from .configuration import path_project
-# Fetch the date of last commit from the parent directory. Initialise to the creation date.
-__date_last_update__ = '2023-08-25'
-
-try:
-    import git
-
-    repo = git.Repo(path_project)
-    tree = repo.tree()
-    for blob in tree:
-        commit = next(repo.iter_commits(paths=blob.path, max_count=1))
-        timestamp = commit.committed_date
-        __date_last_update__ = datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
-
-except ModuleNotFoundError:
-    warnings.warn('Git-python module was not found, but you can install it with <pip install GitPython>. Returning '
-                  'the date of creation.',
-                  UserWarning)
-
-except:
-    warnings.warn('Could not retrieve the date of last commit. Returning the date of creation.',
-                  UserWarning)
-
-# Fetch the version from the base file
-with open(os.path.join(path_project, "src", "__version__.py"), "r") as fh:
-    exec_output = {}
-    exec(fh.read(), exec_output)
-    __version__ = exec_output["__version__"]
-
-# Check the str format of the variables
-assert isinstance(__version__, str)
-assert isinstance(__date_last_update__, str)
-
-# Build citation handle for bibtex
-__cite__ = (r"@software{altamura_elections," "\n"
+
+# The date of last commit is cached in a plain text file when building the package (see setup.py), for the installs
+# that have no git history
+_last_commit_file = Path(__file__).parent / '_last_commit.txt'
+
+
+def _get_date_last_update() -> str:
+    """
+    Get the date of the last commit, in YYYY-MM-DD format.
+
+    In a git checkout, the date is fetched from the repository with GitPython, so that it follows every new commit.
+    Otherwise, it is read from the `_last_commit.txt` file written at build time. If neither works, the date of
+    creation is returned.
+
+    :return: The date of the last update of the project.
+    """
+    try:
+        import git
+
+        # The most recent commit on HEAD carries the latest date across all files: no need to walk the tree
+        timestamp = git.Repo(path_project).head.commit.committed_date
+        return datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
+
+    except ModuleNotFoundError:
+        reason = 'Git-python module was not found, but you can install it with <pip install GitPython>.'
+
+    except:
+        reason = 'Could not retrieve the date of last commit.'
+
+    # Installed packages have no git history, but come with the date cached at build time
+    try:
+        return _last_commit_file.read_text().strip()
+
+    except OSError:
+        pass
+
+    # Neither is available: fall back to the creation date
+    warnings.warn(f"{reason:s} Returning the date of creation.", UserWarning)
+    return '2023-08-25'
+
+
+def _build_cite() -> str:
+    """
+    Build the citation handle for bibtex.
+
+    :return: The bibtex entry for citing this software.
+    """
+    # Goes through the module attribute lookup, so the date is resolved (and cached) only once
+    date_last_update = getattr(sys.modules[__name__], '__date_last_update__')
+
+    # Check the str format of the variables
+    assert isinstance(__version__, str)
+    assert isinstance(date_last_update, str)
+
+    return (r"@software{altamura_elections," "\n"
             r"  author = {{Altamura}, Edoardo}," "\n"
             r'  title = {"An statistical machine learning framework for election predictions"},' "\n"
             r"  url = {https://github.com/edoaltamura/election-predictions}," "\n"
             f"  version = {{{__version__:s}}}," "\n"
-            f"  date = {{{__date_last_update__:s}}}," "\n"
+            f"  date = {{{date_last_update:s}}}," "\n"
             r"}")
+
+
+_lazy_attributes = {
+    '__date_last_update__': _get_date_last_update,
+    '__cite__': _build_cite,
+}
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Compute `__cite__` and `__date_last_update__` on first access only (PEP 562), then cache them in the module.
+
+    :param name: Name of the attribute requested from the module.
+    :return: The value of the requested attribute.
+    :raises AttributeError: If the attribute does not exist in the module.
+    """
+    if name in _lazy_attributes:
+        globals()[name] = _lazy_attributes[name]()
+        return globals()[name]
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
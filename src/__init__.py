@@ -28,8 +28,33 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
-from .__cite__ import __cite__
+from typing import Any
+
 from .__version__ import __version__
 from .data_engineering import DataEngineering
 from .data_science import DataScience
-from .visualisation import PlotTimeSeries
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Load some attributes on first access only (PEP 562): the citation handle, since building it may query the git
+    repository, and `PlotTimeSeries`, since importing matplotlib is slow and not needed unless plotting.
+
+    :param name: Name of the attribute requested from the package.
+    :return: The bibtex citation string if `name` is '__cite__', the `PlotTimeSeries` class if 'PlotTimeSeries'.
+    :raises AttributeError: If the attribute does not exist in the package.
+    """
+    if name == 'PlotTimeSeries':
+        from .visualisation import PlotTimeSeries
+
+        globals()['PlotTimeSeries'] = PlotTimeSeries
+        return PlotTimeSeries
+
+    if name == '__cite__':
+        from .__cite__ import __cite__ as cite
+
+        # Importing the submodule binds it to the package namespace: replace it with the citation string
+        globals()['__cite__'] = cite
+        return cite
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
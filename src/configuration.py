@@ -29,7 +29,8 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 from dataclasses import dataclass, is_dataclass, field
-from typing import List, Type, Callable, Any, TypeVar
+from functools import lru_cache
+from typing import Tuple, Type, Callable, Any, TypeVar
 import os.path
 import pathlib
 
@@ -37,6 +38,8 @@ path_project = pathlib.Path(__file__).parent.parent.resolve()
 
 T = TypeVar('T')
 
+_DESCRIPTIONS: Tuple[str, ...] = ('raw', 'interim', 'final')
+
 
 def nested_dataclass(*args: Any, **kwargs: Any) -> Callable[[Type[T]], Type[T]]:
     """
@@ -85,12 +88,15 @@ def nested_dataclass(*args: Any, **kwargs: Any) -> Callable[[Type[T]], Type[T]]:
         cls = dataclass(cls, **kwargs)
         original_init = cls.__init__
 
+        # Resolve the dataclass-typed fields once, at decoration time, rather than on every instantiation
+        nested_fields = {name: field_type for name, field_type in cls.__annotations__.items()
+                         if is_dataclass(field_type)}
+
         def __init__(self: T, *args: Any, **kwargs: Any) -> None:
-            for name, value in kwargs.items():
-                field_type = cls.__annotations__.get(name, None)
-                if is_dataclass(field_type) and isinstance(value, dict):
-                    new_obj = field_type(**value)
-                    kwargs[name] = new_obj
+            for name, field_type in nested_fields.items():
+                value = kwargs.get(name, None)
+                if isinstance(value, dict):
+                    kwargs[name] = field_type(**value)
             original_init(self, *args, **kwargs)
 
         cls.__init__ = __init__
@@ -107,7 +113,7 @@ class _DataConfigPaths:
     This class defines paths for storing different types of data, such as raw, interim, and final data.
     """
     _base: str = os.path.join(path_project, 'data')
-    _descriptions: List[str] = field(default_factory=lambda: ['raw', 'interim', 'final'])
+    _descriptions: Tuple[str, ...] = _DESCRIPTIONS
 
     def __post_init__(self):
         """
@@ -125,13 +131,18 @@ class _DataConfigPaths:
 
     def check_directories(self):
         """
-        Checks if directories exist and creates them if necessary.
+        Creates the data directories if they do not exist yet.
         """
         for description in self._descriptions:
             directory = getattr(self, description)
-            if not os.path.isdir(directory):
-                print(f'Creating data directory: {directory:s}')
-                os.mkdir(directory)
+
+            # A single call per directory, with no separate existence check: it fails only if the directory exists
+            try:
+                os.makedirs(directory)
+            except FileExistsError:
+                continue
+
+            print(f'Creating data directory: {directory:s}')
 
 
 @nested_dataclass(frozen=True)
@@ -144,7 +155,7 @@ class ConfigPaths:
     reports: str = os.path.join(path_project, 'reports')
     notebooks: str = os.path.join(path_project, 'notebooks')
     mplstyles: str = os.path.join(path_project, 'src', 'mplstyles')
-    data: _DataConfigPaths = _DataConfigPaths()
+    data: _DataConfigPaths = field(default_factory=_DataConfigPaths)
 
     def __repr__(self):
         """
@@ -153,4 +164,28 @@ class ConfigPaths:
         return f'This is a {self.__class__.__name__} instance containing static paths to project directories.'
 
 
-cfg_paths = ConfigPaths()
+@lru_cache(maxsize=1)
+def get_cfg_paths() -> ConfigPaths:
+    """
+    Get the project paths configuration, building it on first call only.
+
+    The data directories are checked (and created, if needed) the first time the paths are requested, rather than
+    when the module is imported. Subsequent calls return the same cached instance.
+
+    :return: The `ConfigPaths` instance shared across the project.
+    """
+    return ConfigPaths()
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Lazily resolve `cfg_paths` as a module attribute (PEP 562), for backward compatibility.
+
+    :param name: Name of the attribute requested from the module.
+    :return: The cached `ConfigPaths` instance if `name` is 'cfg_paths'.
+    :raises AttributeError: If the attribute does not exist in the module.
+    """
+    if name == 'cfg_paths':
+        return get_cfg_paths()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -29,21 +29,109 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 import os
+import re
+import numpy as np
 import pandas as pd
-from typing import Optional
-from django.core.validators import URLValidator
-from django.core.exceptions import ValidationError
+from typing import Optional, List, Any
+from urllib.request import urlopen
+from lxml import etree
 
-from .configuration import cfg_paths
+from .configuration import get_cfg_paths
 from .pipeline import measure, development
 from .io import IO
 
+# With Copy-on-Write, methods returning a new DataFrame share the data until it is modified, so reassigning the result
+# of `drop`, `sort_values`, etc. is as cheap as `inplace=True`, without its chained-assignment pitfalls.
+pd.set_option('mode.copy_on_write', True)
+
 URL: str = "https://cdn-dev.economistdatateam.com/jobs/pds/code-test/index.html"
 
+CANDIDATES: List[str] = ['Bulstrode', 'Lydgate', 'Vincy', 'Casaubon', 'Chettam', 'Others']
+
+# http(s) URLs with a dotted host name (or localhost), an optional port and no whitespace or angle brackets
+_url_pattern = re.compile(r'^https?://(?:localhost|(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63}\.?)'
+                          r'(?::\d{1,5})?(?:[/?#][^\s<>"]*)?$', re.IGNORECASE)
+
+# Characters decorating the sample sizes: the asterisk flagging overseas candidates and the thousands separator
+_sample_marks = re.compile(r'[*,]')
+
+# Characters decorating the polling percentages: the % sign and the asterisks flagging alternate questions
+_percentage_marks = re.compile(r'[%*]')
+
+
+def _sample_to_int(cell: Any) -> int:
+    """
+    Convert a sample size cell (e.g. '1,851*') to an integer, without the thousands separator and the asterisk.
+
+    :param cell: The raw cell value, usually a string. Missing values are either NaN floats or None.
+    :return: The sample size as an integer, or -1 if the cell has no valid number.
+    """
+    if isinstance(cell, str):
+        cell = _sample_marks.sub('', cell).strip()
+        return int(cell) if cell.isdigit() else -1
+
+    return -1 if cell is None or cell != cell else int(cell)
+
+
+def _percentage_to_float(cell: Any) -> float:
+    """
+    Convert a polling percentage cell (e.g. '34.8%' or '**') to a float, without the % sign.
+
+    :param cell: The raw cell value, usually a string. Missing values are either NaN floats or None.
+    :return: The percentage as a float (not divided by 100), or NaN if the cell has no valid number.
+    """
+    if isinstance(cell, str):
+        cell = _percentage_marks.sub('', cell)
+
+    elif cell is None:
+        return np.nan
+
+    # Leftover text (eg 'n/a' or '–') becomes NaN like an empty cell, instead of aborting the whole cleaning
+    try:
+        return float(cell) if cell != '' else np.nan
+
+    except ValueError:
+        return np.nan
+
+
+def _read_html_table(url: str) -> pd.DataFrame:
+    """
+    Read the first HTML table at a URL into a DataFrame of strings.
+
+    The page is streamed through the lxml parser and each row is converted and freed as soon as it is parsed, so the
+    full document tree is never held in memory. The first row gives the column names. Empty cells become None.
+
+    :param url: The URL of the page containing the table.
+    :return: DataFrame with the content of the table, with all values as strings or None.
+    """
+    columns = None
+    rows = []
+
+    with urlopen(url) as response:
+        for _, element in etree.iterparse(response, events=('end',), tag=('tr', 'table'), html=True):
+
+            # Only the first table is read, as with `pd.read_html(url)[0]`
+            if element.tag == 'table':
+                break
+
+            cells = [''.join(cell.itertext()).strip() for cell in element if cell.tag in ('th', 'td')]
+
+            if columns is None:
+                columns = cells
+            else:
+                rows.append([cell if cell else None for cell in cells])
+
+            # Free the row, and the ones already parsed before it, from the document tree
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    return pd.DataFrame(rows, columns=columns)
+
 
 class DataEngineering(IO):
 
-    def __init__(self, url: str = URL, path: Optional[str] = None, filename: str = "dataland_polling.csv",
+    def __init__(self, url: str = URL, path: Optional[str] = None, filename: str = "dataland_polling.parquet",
                  reset: bool = False, save_copy_in_final: bool = True) -> None:
         """
         Initialize a DataEngineering instance for data loading and cleaning.
@@ -53,8 +141,9 @@ class DataEngineering(IO):
 
         :param url: The URL from which to load data.
         :param path: The path where the data files will be saved.
-        :param filename: The name of the data file.
-        :param reset: If True, reset and reload the data even if it exists.
+        :param filename: The name of the Parquet data file, used for both the raw and the clean data.
+        :param reset: If True, reset and reload the data even if it exists. Otherwise, the clean data is loaded from
+            file if it was produced from the current raw data file, skipping both the cleaning and the saving.
         :param save_copy_in_final: If True, also saves a copy of the clean dataset in the `final` data directory.
         """
         super().__init__()
@@ -62,60 +151,92 @@ class DataEngineering(IO):
         self.path = path
         self.filename = filename
 
-        self.raw_data_file = os.path.join(cfg_paths.data.raw, self.filename)
+        self.raw_data_file = os.path.join(get_cfg_paths().data.raw, self.filename)
         if not os.path.isfile(self.raw_data_file) or reset:
             # Initialise empty dataframe
             self.data = pd.DataFrame()
             self.load_from_url()
 
-        self.clean_data_file = os.path.join(cfg_paths.data.interim, self.filename)
-        if not hasattr(self, 'data'):
-            self.data = self.load_from_file()
+        # The clean data is stored as Parquet, which preserves the dtypes and is much faster to load than a CSV
+        self.clean_data_file = os.path.join(get_cfg_paths().data.interim, self.filename)
 
-        if not os.path.isfile(self.clean_data_file) or reset:
-            self.clean_data()
+        # The signature of the raw file used for the clean data is stored next to it, to detect stale clean data
+        self.signature_file = f"{self.clean_data_file:s}.sig"
+
+        if not reset and os.path.isfile(self.clean_data_file) and self.is_clean_data_current():
+            # Cache hit: the clean data was produced from this very raw file, so there is nothing to clean or save
+            self.load_from_file()
+            return
+
+        if not hasattr(self, 'data'):
+            # Initialise empty dataframe: `clean_data` starts again from the raw data saved locally
+            self.data = pd.DataFrame()
 
+        self.clean_data()
         self.save_clean_data(save_copy_in_final=save_copy_in_final)
 
+    def get_raw_data_signature(self) -> str:
+        """
+        Get a cheap signature of the raw data file, made of its modification time and size.
+
+        :return: The signature of the raw data file, as a string.
+        """
+        stat = os.stat(self.raw_data_file)
+        return f"{stat.st_mtime_ns:d} {stat.st_size:d}"
+
+    def is_clean_data_current(self) -> bool:
+        """
+        Check whether the clean data file was produced from the current raw data file.
+
+        :return: True if the signature saved with the clean data matches the raw data file, False otherwise.
+        """
+        try:
+            with open(self.signature_file) as signature_file:
+                return signature_file.read().strip() == self.get_raw_data_signature()
+
+        except FileNotFoundError:
+            return False
+
     @measure
     def load_from_url(self) -> pd.DataFrame:
         """
         Load data from the specified URL.
 
-        This method loads data from the provided URL and saves it as a CSV file. It also returns the loaded data as
-        a Pandas DataFrame.
+        This method streams the polling table from the provided URL and saves it as a Parquet file, which is read back
+        without any text parsing. It also returns the loaded data as a Pandas DataFrame.
 
         :return: DataFrame containing the loaded data.
         """
-        self.data = pd.read_html(self.url)[0]
-        self.data.to_csv(self.raw_data_file, index=False, na_rep='NaN', mode='w', sep=',')
+        self.data = _read_html_table(self.url)
+        self.to_parquet(self.data, self.raw_data_file)
         return self.data
 
     @staticmethod
-    def validate_url(url: str):
+    def validate_url(url: str) -> bool:
         """
         Validate the format of a URL.
 
-        This method validates the format of the given URL using a URLValidator.
+        This method validates the format of the given URL against a compiled regular expression, which accepts http and
+        https URLs with a valid host name.
 
         :param url: The URL to be validated.
+        :return: True if the URL is valid, False otherwise.
         """
-        validator = URLValidator(verify_exists=False)
-        try:
-            validator(url)
-        except ValidationError as err:
-            print(f"The requested URL {url} is not valid. Check the initialisation of `DataEngineering(url='...')`.",
-                  err)
+        if _url_pattern.match(url) is None:
+            print(f"The requested URL {url} is not valid. Check the initialisation of `DataEngineering(url='...')`.")
+            return False
+
+        return True
 
     def load_from_file(self) -> pd.DataFrame:
         """
-        Load data from a local CSV file.
+        Load the clean data from a local Parquet file.
 
-        This method reads data from a local CSV file and returns it as a Pandas DataFrame.
+        This method reads the clean data from the local Parquet file and returns it as a Pandas DataFrame.
 
         :return: DataFrame containing the loaded data.
         """
-        self.data = self.read_csv(self.clean_data_file)
+        self.data = self.read_parquet(self.clean_data_file)
         return self.data
 
     @development
@@ -138,79 +259,78 @@ class DataEngineering(IO):
             ```
         """
         if self.data.empty:
-            self.data = pd.read_csv(self.raw_data_file)
+            self.data = self.read_parquet(self.raw_data_file)
 
-        # Create a new column with True for rows containing '*' and False otherwise
-        self.data['Excludes overseas candidates'] = self.data['Sample'].str.contains('\*', regex=True)
-        self.data['Sample'] = self.data['Sample'].str.replace('\*', '', regex=True).str.replace(',', '')
-        self.data['Sample'] = pd.to_numeric(self.data['Sample'], errors='coerce', downcast='integer')
+        # Create a new column with True for rows containing '*' and False otherwise. Then strip both the asterisk and
+        # the thousands separator with one compiled regex, instead of chaining `.str` calls over the whole column.
+        sample = self.data['Sample'].tolist()
+        self.data['Excludes overseas candidates'] = [isinstance(cell, str) and '*' in cell for cell in sample]
+        sample = np.fromiter((_sample_to_int(cell) for cell in sample), dtype=np.int32, count=len(sample))
 
-        self.data['Included in alternate question'] = self.data['Chettam'].str.contains('\*\*', regex=True)
-        self.data['Included in alternate question'].fillna(False, inplace=True)
+        # Sample sizes fit in int32, so there is no need to scan the column again to downcast it. Missing sizes are
+        # flagged with -1 while parsing and only force a float column (with NaN) if there are any.
+        missing_sample = sample < 0
+        self.data['Sample'] = np.where(missing_sample, np.nan, sample) if missing_sample.any() else sample
 
-        # Convert percentage signs into fractions
-        for col in ['Bulstrode', 'Lydgate', 'Chettam', 'Vincy', 'Casaubon', 'Others']:
+        # The double asterisks are stripped from `Chettam` later, together with the % signs
+        self.data['Included in alternate question'] = [isinstance(cell, str) and '**' in cell
+                                                       for cell in self.data['Chettam'].tolist()]
 
-            # Default formatting has the % sign, so detect the elements that have it to flag those that do not.
-            mask = self.data[col].str.contains('%', na=False)
+        # Convert percentage signs into fractions, parsing the cells of all candidates in a single pass
+        cells = self.data[CANDIDATES].to_numpy(dtype=object).ravel()
 
-            # `Chettam` contains double asterisks and requires additional processing
-            if col == 'Chettam':
-                self.data[col] = self.data[col].str.replace('\*\*', '', regex=True).str.rstrip('%')
-                self.data[col] = pd.to_numeric(self.data[col], errors='coerce', downcast='float') / 100.0
+        # Default formatting has the % sign, so detect the elements that have it to flag those that do not.
+        mask = np.array([isinstance(cell, str) and '%' in cell for cell in cells]).reshape(-1, len(CANDIDATES))
 
-            else:
-                self.data[col] = self.data[col].str.rstrip('%').astype('float') / 100.0
+        # `Chettam` contains double asterisks, which are stripped together with the % signs
+        fractions = np.array([_percentage_to_float(cell) for cell in cells], dtype=np.float32)
+        self.data[CANDIDATES] = fractions.reshape(-1, len(CANDIDATES)) / np.float32(100.0)
 
-            # Detect and print messages for badly formatted rows
-            badly_formatted_rows = self.data.loc[~mask]
+        # Detect and print messages for badly formatted rows
+        for col, n_badly_formatted_rows in zip(CANDIDATES, (~mask).sum(axis=0)):
+            if n_badly_formatted_rows > 0:
+                print(f"Found {n_badly_formatted_rows:d} badly formatted rows in column '{col}':")
 
-            if not badly_formatted_rows.empty:
-                print(f"Found {len(badly_formatted_rows):d} badly formatted rows in column '{col}':")
+        # Polling dates repeat across pollsters: parse each distinct date string once, then broadcast them back to the
+        # rows with the integer codes. Missing dates get code -1 and are filled with NaT.
+        date_codes, unique_dates = pd.factorize(self.data['Date'])
+        unique_dates = pd.to_datetime(unique_dates, format='%m/%d/%y')
+        self.data['Date'] = unique_dates.take(date_codes, allow_fill=True, fill_value=pd.NaT)
 
-        self.data['Date'] = pd.to_datetime(self.data['Date'], format='%m/%d/%y')
-        self.data['Pollster'] = self.data['Pollster'].apply(str)
+        # Pollster names are a small set repeated across many rows: store them as categorical codes, so that sorting and
+        # hashing for the duplicates below compare small integers instead of Python strings. The names are already
+        # parsed as strings, so there is no need to convert each cell with `str` first.
+        self.data['Pollster'] = self.data['Pollster'].astype('category')
 
         # Account for double counts
-        if self.data['Included in alternate question'].any():
+        alternate_question = self.data['Included in alternate question']
+        if alternate_question.any():
             print('Some pollsters have given multiple responses:')
+            print(f"\t{self.data.loc[alternate_question, 'Pollster'].unique().tolist()}")
 
             duplication_criteria = ['Date', 'Pollster', 'Sample']
 
-            last = self.data[self.data.duplicated(subset=duplication_criteria, keep='first')]
-            print(f"\t{last['Pollster'].unique()}")
-            assert last['Included in alternate question'].all()
-
-            first = self.data[self.data.duplicated(subset=duplication_criteria, keep='last')]
-            assert last['Included in alternate question'].all()
-            last.index = first.index
+            # Merge the answers of each poll in a single hash pass. The most recent answer is kept, while `Chettam`
+            # (missing from the alternate question) is copied from the other answer. `first` and `last` skip NaNs.
+            aggregations = {column: 'last' for column in self.data.columns if column not in duplication_criteria}
+            aggregations['Chettam'] = 'first'
 
-            # Copy the missing value from the other answer
-            last.loc[first.index, 'Chettam'] = first['Chettam']
+            n_rows = len(self.data)
+            self.data = self.data.groupby(duplication_criteria, sort=False, observed=True, dropna=False,
+                                          as_index=False).agg(aggregations)
+            print(f"Considering only the most recent information: dropped {n_rows - len(self.data):d} rows.")
 
-            # Drop the old answer and keep only the most recent. If not done, it will create duplicate `Date` labels.
-            self.data.loc[last.index] = last
-            self.data.drop(index=first.index, inplace=True)
-            print(
-                (f"Considering only the most recent information:\n\t{last['Date'].tolist()}"
-                 "\nDropping rows: {first.index}")
-            )
+        self.data = self.data.drop(columns=['Included in alternate question'])
 
-            # Subsets not needed anymore - free up some memory.
-            del first, last
-
-        self.data.reset_index(drop=True, inplace=True)
-        self.data.drop(['Included in alternate question'], inplace=True, axis=1)
-
-        # Sort by date and group by pollster
-        self.data.sort_values(['Pollster', 'Date'], ignore_index=True, inplace=True)
-        self.data.reset_index(drop=True, inplace=True)
+        # Sort by date and group by pollster. A stable sort keeps the original order of ties, and `ignore_index`
+        # relabels the rows 0..n-1 in the same pass, so no separate `reset_index` is needed.
+        self.data = self.data.sort_values(['Pollster', 'Date'], kind='stable', ignore_index=True)
 
         return self.data
 
     def save_clean_data(self, save_copy_in_final: bool = True) -> None:
         """
-        Save the cleaned data to a CSV file and optionally save a copy in the final data directory.
+        Save the cleaned data to a Parquet file and optionally save a CSV copy in the final data directory.
 
         :param save_copy_in_final: Whether to save a copy of the cleaned data in the final data directory. Defaults to True.
 
@@ -218,15 +338,19 @@ class DataEngineering(IO):
             ```python
             data_engineering = DataEngineering(url='https://example.com/data.csv')
 
-            # Save the cleaned data to a CSV file (default behavior).
+            # Save the cleaned data to a Parquet file (default behavior).
             data_engineering.save_clean_data()
 
-            # Save the cleaned data to a CSV file and skip saving a copy in the final data directory.
+            # Save the cleaned data to a Parquet file and skip saving a copy in the final data directory.
             data_engineering.save_clean_data(save_copy_in_final=False)
             ```
         """
 
-        self.to_csv(self.data, self.clean_data_file)
+        self.to_parquet(self.data, self.clean_data_file)
+
+        # Record which raw file the clean data comes from, so the next instances can skip the cleaning
+        with open(self.signature_file, 'w') as signature_file:
+            signature_file.write(self.get_raw_data_signature())
 
         if save_copy_in_final:
-            self.data.to_csv(os.path.join(cfg_paths.data.final, 'polls.csv'))
+            self.data.to_csv(os.path.join(get_cfg_paths().data.final, 'polls.csv'), float_format=self.csv_float_format)
@@ -30,18 +30,25 @@ THE SOFTWARE.
 """
 import sys
 import os
+import numpy as np
 import pandas as pd
+import polars as pl
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal.windows import gaussian
 from typing import Union, Optional, Dict, List
 from tqdm.auto import tqdm
+from joblib import Parallel, delayed
 from warnings import warn
 
 from .io import IO
-from .configuration import cfg_paths
+from .configuration import get_cfg_paths
+from .data_engineering import CANDIDATES
 
 
 class DataScience(IO):
 
-    def __init__(self, df: pd.DataFrame, regularise: bool = True, split_basename: str = 'pollster_split') -> None:
+    def __init__(self, df: pd.DataFrame, regularise: bool = True, split_basename: str = 'pollster_split',
+                 save_splits: bool = False, save_results: bool = True) -> None:
         """
         DataScience class for analyzing polling data.
 
@@ -51,105 +58,142 @@ class DataScience(IO):
         :param df: Input DataFrame containing polling data.
         :param regularise: Boolean flag indicating whether to regularize time series data (default is True).
         :param split_basename: Base name for split files (default is 'pollster_split').
-        :raises FileNotFoundError: If required files are not found in the interim data directory.
+        :param save_splits: If True, also save the pollster splits and their list to the interim data directory, for
+            debugging only: these files are not tracked and not refreshed by default runs. The polling averages are
+            computed from the splits in memory in any case (default is False).
+        :param save_results: If True, dump the polling averages and trends to the final data directory with
+            `dump_results` (default is True).
         """
         super().__init__()
-        self.data = df
+
+        # Polling fractions fit in float32 and pollster names are a small set of labels: downcasting them halves the
+        # memory traffic of the resampling and averaging below. No copy is made if the dtypes already match.
+        dtypes = {candidate: 'float32' for candidate in CANDIDATES if candidate in df.columns}
+        dtypes['Pollster'] = 'category'
+        self.data = df.astype(dtypes)
+
         self.split_basename = split_basename
 
-        self.split_pollsters(regularise=regularise)
+        # Pollster name -> time series of that pollster, filled by `split_pollsters`
+        self.splits: Dict[str, pd.DataFrame] = {}
+
+        self.split_pollsters(regularise=regularise, save=save_splits)
         dfs = self.compute_polling_averages()
-        self.dump_results(dfs)
 
-    def get_split_file_path(self, pollster_name: str) -> str:
-        """
-        Get the file path for the split data of a specific pollster.
+        if save_results:
+            self.dump_results(dfs)
 
-        :param pollster_name: Name of the pollster.
-        :return: File path for the split data of the specified pollster.
+    def get_splits_dataset_path(self) -> str:
         """
+        Get the path of the Parquet dataset with the split data of all pollsters, partitioned by pollster.
 
-        _pollster_join_name = '-'.join(pollster_name.split())
-        _pollster_join_name = f"{self.split_basename:s}_{_pollster_join_name:s}.csv"
-
-        return os.path.join(cfg_paths.data.interim, _pollster_join_name)
+        :return: Path of the root directory of the dataset.
+        """
+        return os.path.join(get_cfg_paths().data.interim, self.split_basename)
 
-    def load_pollster_from_file(self, pollster_name: str) -> pd.DataFrame:
+    def load_pollster_from_file(self, pollster_name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
         """
-        Load data of a specific pollster from a file.
+        Load data of a specific pollster from the split dataset.
+
+        Only the partition of the requested pollster is read, with the requested columns.
 
         :param pollster_name: Name of the pollster.
+        :param columns: Columns to read. Defaults to None, for all columns.
         :return: DataFrame containing the data of the specified pollster.
-        :raises FileNotFoundError: If the file for the specified pollster is not found.
+        :raises FileNotFoundError: If the data for the specified pollster is not found.
         """
+        dataset_path = self.get_splits_dataset_path()
 
-        file_path = self.get_split_file_path(pollster_name)
+        _df = pd.DataFrame()
+        if os.path.isdir(dataset_path):
+            _df = self.read_parquet(dataset_path, columns=columns, filters=[('Pollster', '==', pollster_name)])
 
-        if not os.path.isfile(file_path):
+        if _df.empty:
             raise FileNotFoundError(
-                (f"File for pollster '{pollster_name:s}' not found in the interim data directory. Check "
+                (f"Data for pollster '{pollster_name:s}' not found in the interim data directory. Check "
                  "that the interim directory is correctly configured, or check that the "
                  "`DataScience.split_pollsters()` function was called."))
 
-        _df = self.read_csv(file_path)
         return _df
 
     def load_pollsters_list_from_file(self) -> List[str]:
         """
         Load the list of pollsters from a file.
 
+        If the pollsters were split in this session, the list is returned from memory and the file is not read. The
+        file is only written by `split_pollsters(save=True)`, for debugging.
+
         :return: List of pollster names.
         :raises FileNotFoundError: If the list file is not found.
         """
-        file_path = os.path.join(cfg_paths.data.interim, f'{self.split_basename:s}_list.csv')
+        if self.splits:
+            return list(self.splits)
+
+        file_path = os.path.join(get_cfg_paths().data.interim, f'{self.split_basename:s}_list.csv')
 
         if not os.path.isfile(file_path):
             raise FileNotFoundError(
                 (f"File with the list of pollsters '{file_path:s}' not found in the interim data directory. Check "
                  "that the interim directory is correctly configured, or check that the "
-                 "`DataScience.split_pollsters()` function was called."))
+                 "`DataScience.split_pollsters(save=True)` function was called."))
 
         return pd.read_csv(file_path).values.flatten().tolist()
 
-    def split_pollsters(self, regularise: bool = True, **kwargs) -> None:
+    def split_pollsters(self, regularise: bool = True, save: bool = False, n_jobs: int = -1,
+                        **kwargs) -> Dict[str, pd.DataFrame]:
         """
-        Split the polling data by pollster and save it to files.
+        Split the polling data by pollster and keep the splits in memory, in the `splits` attribute.
+
+        The pollsters are independent of each other, so they are regularised in parallel threads.
 
         :param regularise: Boolean flag indicating whether to regularize time series data (default is True).
+        :param save: If True, also save the splits and the list of pollsters to files (default is False).
+        :param n_jobs: Number of threads processing the pollsters, as in `joblib.Parallel` (default is -1, all cores).
         :param kwargs: Additional keyword arguments for regularizing time series data.
+        :return: Dictionary with the pollster names as keys and their polling data as values.
         """
         # First get the unique names of pollsters
         unique_pollsters = self.data['Pollster'].unique()
 
-        # Save list of pollsters to file
-        unique_pollsters_dump = pd.Series(unique_pollsters)
-        unique_pollsters_dump.rename('Pollsters', inplace=True)
-        unique_pollsters_path = os.path.join(cfg_paths.data.interim, f'{self.split_basename:s}_list.csv')
-        unique_pollsters_dump.to_csv(unique_pollsters_path, index=False, header=True)
+        if save:
+            # Save list of pollsters to file
+            unique_pollsters_dump = pd.Series(unique_pollsters)
+            unique_pollsters_dump.rename('Pollsters', inplace=True)
+            unique_pollsters_path = os.path.join(get_cfg_paths().data.interim, f'{self.split_basename:s}_list.csv')
+            unique_pollsters_dump.to_csv(unique_pollsters_path, index=False, header=True)
 
-        # Use the walrus parsing technique to update the description of the pbar with the current pollster
-        for pollster in (pbar := tqdm(unique_pollsters, file=sys.stdout)):
+        # Group the rows by pollster in a single hash pass, instead of scanning the whole column for each pollster
+        pollster_splits = self.data.groupby('Pollster', sort=False, observed=True)
 
-            # Dynamically display the pollster being searched
-            pbar.set_description(f"Splitting '{pollster:s}'")
+        pollster_splits = [pollster_splits.get_group(pollster) for pollster in unique_pollsters]
 
-            # Get the subset corresponding to a particular pollster
-            pollster_split = self.data.loc[self.data['Pollster'] == pollster]
+        if regularise:
+            # Threads share the data with no pickling, and NumPy releases the GIL for the heavy work.
+            # The results come back in the order of the pollsters.
+            pollster_splits = Parallel(n_jobs=n_jobs, prefer='threads')(
+                delayed(self.regularise_time_series)(pollster_split, **kwargs)
+                for pollster_split in tqdm(pollster_splits, desc='Regularising pollsters', file=sys.stdout)
+            )
 
-            if regularise:
-                pollster_split = self.regularise_time_series(pollster_split, **kwargs)
+        self.splits = dict(zip(unique_pollsters, pollster_splits))
 
-            # Save it to interim data directory
-            self.to_csv(pollster_split, self.get_split_file_path(pollster))
+        if save:
+            # Save all the splits to the interim data directory as a single dataset, with one partition per pollster.
+            # The pollster name labels all the rows, including the interpolated ones.
+            splits = pd.concat([pollster_split.assign(Pollster=pollster)
+                                for pollster, pollster_split in self.splits.items()], ignore_index=True)
+            self.to_parquet(splits, self.get_splits_dataset_path(), partition_cols=['Pollster'])
+
+        return self.splits
 
     @staticmethod
     def regularise_time_series(df: pd.DataFrame, resample_every: str = '24h') -> pd.DataFrame:
         """
         Regularize a time series DataFrame by interpolating missing data and resampling.
 
-        This method regularizes a time series DataFrame by interpolating missing data points and resampling it at
-        a specified frequency. It ensures that timestamps are unique and fills non-numeric columns with the most
-        recent instance.
+        This method regularizes a time series DataFrame by resampling it at a specified frequency and interpolating the
+        numeric columns linearly in time with `np.interp`. It ensures that timestamps are unique and fills non-numeric
+        columns with the most recent instance.
 
         :param df: Input time series DataFrame.
         :param resample_every: Frequency for resampling (default is '24h').
@@ -180,15 +224,43 @@ class DataScience(IO):
                               f"its outputs, as well as the `df['Included in alternate question']` boolean.\nList of "
                               f"duplicate timestamps:\n{df[df.duplicated(subset=['Date'], keep='first')]}"))
 
-        df.index = pd.to_datetime(df['Date'])
+        df = df.sort_values('Date')
+        dates = pd.DatetimeIndex(pd.to_datetime(df['Date']), name='Date')
+
+        # Regular time grid, with the non-numeric values (eg `Pollster`) only on the dates of the polls
+        grid = pd.date_range(dates[0].normalize(), dates[-1], freq=resample_every, name='Date')
+        _resampled_data = df.set_index(dates).reindex(grid)
+        _resampled_data['Date'] = grid
+
+        # Interpolate linearly in time on the grid points directly, with no intermediate 12-hour grid.
+        # Values more than 28 days (14 * 4 intervals of 12 hours) after the last valid value are left missing.
+        # TODO: the interpolation limit should computed dynamically from the data.
+        x = grid.asi8
+        limit = pd.Timedelta(hours=12 * 14 * 4).value
+
+        numeric_columns = [col for col in df.columns if col != 'Date' and pd.api.types.is_numeric_dtype(df[col])
+                           and not pd.api.types.is_bool_dtype(df[col])]
+
+        for col in numeric_columns:
+            values = df[col].to_numpy(dtype=np.float64)
+            valid = ~np.isnan(values)
+            xp = dates.asi8[valid]
+
+            interpolated = np.full(len(x), np.nan)
+            if xp.size > 0:
+                interpolated = np.interp(x, xp, values[valid])
 
-        # Interpolate the time-series and resample by a custom amount
-        # TODO: the interpolate(limit=...) should computed dynamically from the first and second resampling.
-        _resampled_data = df.resample('12h').interpolate(limit=14 * 4, limit_direction='forward').resample(
-            resample_every).asfreq()
+                # Leave missing the points before the first valid value and those too far from the last one
+                last_valid = np.searchsorted(xp, x, side='right') - 1
+                interpolated[(last_valid < 0) | (x - xp[np.maximum(last_valid, 0)] > limit)] = np.nan
+
+            # Floats keep their precision, while integers (eg `Sample`) become floats once interpolated
+            dtype = df[col].dtype if pd.api.types.is_float_dtype(df[col]) else np.float64
+            _resampled_data[col] = interpolated.astype(dtype)
 
         # Non-numeric values (eg `Pollster`) are not interpolated. Fill with most recent instance.
-        _resampled_data.loc[:, ['Pollster', 'Excludes overseas candidates']].fillna(method='ffill', inplace=True)
+        labels = [col for col in ['Pollster', 'Excludes overseas candidates'] if col in _resampled_data.columns]
+        _resampled_data[labels] = _resampled_data[labels].ffill()
 
         return _resampled_data
 
@@ -201,8 +273,7 @@ class DataScience(IO):
 
        :param candidates: A list of candidate names or 'all' to compute averages for all candidates (default is 'all').
        :return: A dictionary containing polling averages and trends DataFrames.
-       :raises ValueError: If the candidates argument is invalid.
-       :raises FileNotFoundError: If required data files are missing.
+       :raises ValueError: If the candidates argument is invalid, or if the pollster splits are not available.
        :raises RuntimeWarning: If a pollster provides very few reports.
 
        Example Usage:
@@ -224,10 +295,10 @@ class DataScience(IO):
            ```
        Summary:
        This function calculates polling averages and trends for a specified list of candidates or all candidates in
-       the dataset. It loads pollster data from files, performs weighted averaging, and computes rolling statistics
-       to provide insights into polling trends over time.
+       the dataset. It stacks the pollster splits in a single Polars lazy query, performs weighted averaging for all
+       candidates in one aggregation, and computes rolling statistics to provide insights into polling trends over time.
        """
-        _candidates_all = ['Bulstrode', 'Lydgate', 'Vincy', 'Casaubon', 'Chettam', 'Others']
+        _candidates_all = CANDIDATES
 
         if isinstance(candidates, list):
             _candidates_selected = []
@@ -248,75 +319,56 @@ class DataScience(IO):
             raise ValueError((f"candidates={candidates} is not a valid type or value. Expected 'all' (default), "
                               f"or a list of strings with valid names."))
 
-        # Initialise dictionaries for averages and smoothed averages (ie trends)
-        polling_averages = {}
-        polling_trends = {}
-
-        # Get the list of pollsters from the file. This is static, so get outside of the loop
-        pollsters = self.load_pollsters_list_from_file()
-
-        for candidate in (pbar := tqdm(_candidates, file=sys.stdout)):
-
-            # Dynamically display the candidate being considered
-            pbar.set_description(f"Candidate average for '{candidate:s}'")
-
-            # Initialise the temporary `_df` dataframe that has two columns:
-            # [Sample_{pollster}, {candidate}_{pollster}]
-            pollster = pollsters[0]
-            _df = self.load_pollster_from_file(pollster)
-            _df.set_index('Date', inplace=True)
-            _df = _df.loc[:, ['Sample', candidate]]
-            _df.rename(columns={'Sample': f'Sample_{pollster:s}', candidate: f'{candidate:s}_{pollster:s}'},
-                       inplace=True)
-
-            for pollster in pollsters[1:]:
-                _df_pollster = self.load_pollster_from_file(pollster)
-                _df_pollster.set_index('Date', inplace=True)
-                _df_pollster = _df_pollster.loc[:, ['Sample', candidate]]
-                _df_pollster.rename(
-                    columns={'Sample': f'Sample_{pollster:s}', candidate: f'{candidate:s}_{pollster:s}'},
-                    inplace=True)
-
-                # Perform an outer union with other columns: [Sample_{pollster}, {candidate}_{pollster}]
-                _df = _df.join(_df_pollster, how='outer')
-
-                if n_scarce_poll := len(_df_pollster) < 2:
-                    warn(
-                        (f"\nPollster '{pollster:s}' only gave {n_scarce_poll:d} reports. This behaviour is accounted "
-                         f"for in the weighted averages, but you should investigate this pollster's data further."),
-                        RuntimeWarning
-                    )
-
-            # Having no data is equivalent to a zero weight on Samples
-            _df.fillna(0, inplace=True)
-
-            # Drop rows with NaN index
-            _df = _df[_df.index.notnull()]
-
-            # Compute the sum of samples
-            filter_col = [col for col in _df if col.startswith('Sample')]
-            total_samples = _df[list(filter_col)].sum(axis=1)
-
-            # Compute the sum of weighted polling fractions
-            pollster = pollsters[0]
-            weighted_average = _df[f'{candidate:s}_{pollster:s}'] * _df[f'Sample_{pollster:s}']
-            for pollster in pollsters[1:]:
-                weighted_average += _df[f'{candidate:s}_{pollster:s}'] * _df[f'Sample_{pollster:s}']
-
-            # Realise the weighted average in-place
-            weighted_average /= total_samples
-
-            # Determine rolling statistics
-            weekly_average = weighted_average.rolling(window=7, win_type='gaussian').mean(std=3)
-
-            polling_averages['Date'] = _df.index
-            polling_trends['Date'] = _df.index
-            polling_averages[candidate] = weighted_average.values
-            polling_trends[candidate] = weekly_average.values
-
-        # Finally, convert the products to Pandas DataFrame instances
-        polling_averages = pd.DataFrame(polling_averages)
-        polling_trends = pd.DataFrame(polling_trends)
+        if not self.splits:
+            raise ValueError("No pollster splits available. Call `DataScience.split_pollsters()` first.")
+
+        # Stack the pollster splits in memory as one lazy table: only the columns needed are converted
+        polls = pl.concat([
+            pl.from_pandas(pollster_split[['Date', 'Sample', *_candidates]])
+            .lazy()
+            .with_columns(pl.col('Sample').cast(pl.Float64), pl.lit(pollster).alias('Pollster'))
+            for pollster, pollster_split in self.splits.items()
+        ]).filter(pl.col('Date').is_not_null())
+
+        # Having no data is equivalent to a zero weight on Samples. Sum the weighted polling fractions and the samples
+        # of all pollsters for each date in a single aggregation, then realise the weighted averages.
+        sample = pl.col('Sample').fill_null(0)
+        polling_averages = (
+            polls.group_by('Date')
+            .agg([(pl.col(candidate).fill_null(0) * sample).sum() for candidate in _candidates]
+                 + [sample.sum().alias('Total samples')])
+            .sort('Date')
+            .select(['Date'] + [pl.col(candidate) / pl.col('Total samples') for candidate in _candidates])
+        )
+        n_polls = polls.group_by('Pollster').agg(pl.len().alias('Polls'))
+
+        # Run both queries together, sharing the stacked table
+        polling_averages, n_polls = pl.collect_all([polling_averages, n_polls])
+
+        for pollster, n_scarce_poll in n_polls.filter(pl.col('Polls') < 2).iter_rows():
+            warn(
+                (f"\nPollster '{pollster:s}' only gave {n_scarce_poll:d} reports. This behaviour is accounted "
+                 f"for in the weighted averages, but you should investigate this pollster's data further."),
+                RuntimeWarning
+            )
+
+        polling_averages = polling_averages.to_pandas()
+        polling_averages['Date'] = pd.to_datetime(polling_averages['Date']).astype('datetime64[ns]')
+
+        # Determine rolling statistics (ie trends): a weekly Gaussian-weighted mean for all candidates in one matrix
+        # product, equivalent to `rolling(window=7, win_type='gaussian').mean(std=3)` on each column. Windows that are
+        # incomplete or contain missing values give NaN.
+        window = 7
+        weights = gaussian(window, std=3)
+        weights /= weights.sum()
+
+        averages = polling_averages[_candidates].to_numpy(dtype=np.float64)
+        trends = np.full_like(averages, np.nan)
+        if len(averages) >= window:
+            trends[window - 1:] = sliding_window_view(averages, window, axis=0) @ weights
+
+        polling_trends = polling_averages.copy()
+        polling_trends[_candidates] = trends
 
         return {'polling_averages': polling_averages, 'trends': polling_trends}
 
@@ -350,22 +402,23 @@ class DataScience(IO):
             ```
         """
         for filename, df in dfs.items():
-            df.loc[:, df.columns != 'Date'].astype(float)
-            df['Date'] = pd.to_datetime(df['Date'])
-
-            # Sort the columns by name, as in the template outputs
+            # Sort the columns by name, as in the template outputs. Polling fractions do not need double precision, so
+            # store them as float32 in the same projection.
             candidates_names = sorted(df.columns[df.columns != 'Date'])
-            candidates_names = ['Date'] + candidates_names
-            df = df.reindex(candidates_names, axis=1)
+            df = df[['Date'] + candidates_names].astype(dict.fromkeys(candidates_names, 'float32'))
+
+            # The dates computed by `compute_polling_averages` are already datetimes: only convert other inputs
+            if not pd.api.types.is_datetime64_any_dtype(df['Date']):
+                df['Date'] = pd.to_datetime(df['Date'])
 
             # Save these files in the `final` data directory
-            file_path = os.path.join(cfg_paths.data.final, f'{filename:s}.csv')
+            file_path = os.path.join(get_cfg_paths().data.final, f'{filename:s}.csv')
 
             print(f"Writing dataset '{filename:s}.csv' to: > {file_path:s}")
             if 'average' in filename:
-                self.to_csv(df, file_path)
+                self.to_csv(df, file_path, float_format=self.csv_float_format)
             else:
-                df.to_csv(file_path, index=True, header=True)
+                df.to_csv(file_path, index=True, header=True, float_format=self.csv_float_format)
 
     @staticmethod
     def load_trends(filename: str = 'trends.csv') -> pd.DataFrame:
@@ -385,7 +438,7 @@ class DataScience(IO):
             trends_df = DataScience().load_trends('my_trends.csv')
             ```
         """
-        file_path = os.path.join(cfg_paths.data.final, filename)
+        file_path = os.path.join(get_cfg_paths().data.final, filename)
         _df = pd.read_csv(file_path)
         _df.loc[:, 'Date'] = pd.to_datetime(_df['Date'])
         return _df
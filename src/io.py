@@ -29,18 +29,24 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
+import json
 import pandas as pd
+from typing import Optional, List, Tuple, Any
 
 
 class IO:
 
+    # Float format of the published CSV files: float32 values written with their float64 repr carry noise digits
+    # (eg 0.083000004), while 6 significant digits are more than the polling fractions have
+    csv_float_format: str = '%.6g'
+
     def __init__(self) -> None:
         """
         Custom I/O Operations for Pandas DataFrames.
 
         This class provides custom I/O operations for Pandas DataFrames, allowing you to save
-        DataFrames to CSV files while preserving column data types and read CSV files with
-        explicitly allocated data types and date column parsing.
+        DataFrames to CSV files while preserving column data types (saved in a JSON schema file
+        next to the CSV) and read CSV files with explicitly allocated data types and date column parsing.
 
         Example usage:
             ```python
@@ -75,37 +81,40 @@ class IO:
         pass
 
     @staticmethod
-    def to_csv(df: pd.DataFrame, path: str) -> None:
+    def schema_path(path: str) -> str:
+        """
+        Get the path of the JSON schema file that accompanies a CSV file written by `to_csv`.
+
+        :param path: File path of the CSV file.
+        :return: File path of the schema file, next to the CSV file.
+        """
+        return f"{path:s}.schema.json"
+
+    @staticmethod
+    def to_csv(df: pd.DataFrame, path: str, float_format: Optional[str] = None) -> None:
         """
         Save a Pandas DataFrame to a CSV file while preserving column data types.
 
         This method is designed to extend the functionality of the Pandas `to_csv` method
-        by explicitly saving the data types of each column in the CSV file. It does so by
-        prepending a row of data types to the DataFrame before saving it to the CSV file.
+        by explicitly saving the data types of each column. The CSV file is written as is, and
+        the data types are saved in a small JSON schema file next to it (see `schema_path`).
 
         :param df: Input DataFrame to be saved to a CSV file.
         :param path: File path where the CSV file will be saved.
+        :param float_format: Format string for the floating point numbers, as in `pd.DataFrame.to_csv`. Defaults to
+            None, for the shortest representation of each value.
         :return: None
 
         Note:
-            To preserve column data types, this method inserts a row containing data types
-            at the beginning of the DataFrame before saving it to the CSV file. This approach
-            differs from a previously used method (now deprecated), which appended data types
-            to the end of the DataFrame.
-
-        Reference:
-            https://stackoverflow.com/a/43408736/7607701
-
+            A previous version of this method prepended a row of data types to the DataFrame
+            before saving it. That required a full copy of the DataFrame and a second read
+            when loading. Files in that format can still be read with `read_csv`.
         """
-        dtypes_addon = []
-        dtypes_addon.insert(0, dict(zip(df.columns.tolist(), df.dtypes.tolist())))
-        dtypes_addon = pd.DataFrame(dtypes_addon)
-
-        # Concatenate the mini-DataFrame with dtypes and then append the rest of the data
-        _df = pd.concat([dtypes_addon, df], ignore_index=True)
+        df.to_csv(path, index=False, float_format=float_format)
 
-        # Then save it to a csv
-        _df.to_csv(path, index=False)
+        # Save the data types separately, so the CSV can be read back in a single pass
+        with open(IO.schema_path(path), 'w') as schema_file:
+            json.dump(df.dtypes.astype(str).to_dict(), schema_file, indent=4)
 
     @staticmethod
     def read_csv(path: str) -> pd.DataFrame:
@@ -113,17 +122,33 @@ class IO:
         Read a CSV file while explicitly allocating data types and parsing date columns.
 
         This method extends the functionality of the Pandas `read_csv` method by reading
-        the second line of the CSV file to determine column data types and parsing date columns
-        when appropriate. It then reads the full CSV file using these explicitly allocated data types.
-        It detects the `datetime64[ns]` type and reads it as an `object` instance. This process is
-        required by Pandas. Then, uses the `parse_dates` kwargs to convert it to the correct type.
+        the column data types from the JSON schema file written by `to_csv`, and then reading
+        the CSV file in a single pass with these explicitly allocated data types. It detects the
+        `datetime64[ns]` type and reads it as an `object` instance. This process is required by Pandas.
+        Then, uses the `parse_dates` kwargs to convert it to the correct type.
+
+        If the schema file is not found, the data types are read from the second line of the
+        CSV file, as written by older versions of `to_csv`, and that line is skipped when reading the data.
+
+        The C parser is used rather than PyArrow, since PyArrow ignores `dtype=object` and would infer numbers or
+        booleans from strings such as '001' or 'True'.
 
         :param path: File path to the CSV file to be read.
         :return: DataFrame containing the data from the CSV file.
         """
+        try:
+            with open(IO.schema_path(path)) as schema_file:
+                schema = json.load(schema_file)
+            skiprows = None
+
+        except FileNotFoundError:
+            # Older format: the line after the header holds the dtypes and is skipped when reading the data
+            schema = pd.read_csv(path, nrows=1).iloc[0].to_dict()
+            skiprows = [1]
+
         dtypes = {}
         parse_dates = []
-        for k, v in pd.read_csv(path, nrows=1).iloc[0].to_dict().items():
+        for k, v in schema.items():
 
             if 'datetime64[ns]' in v:
                 dtypes[k] = 'object'
@@ -131,6 +156,42 @@ class IO:
             else:
                 dtypes[k] = v
 
-        # Read the rest of the lines with the types from above
-        # Skipping row 1 avoids importing the dtypes line
-        return pd.read_csv(path, parse_dates=parse_dates, dtype=dtypes, skiprows=[1])
+        return pd.read_csv(path, parse_dates=parse_dates, dtype=dtypes, skiprows=skiprows)
+
+    @staticmethod
+    def to_parquet(df: pd.DataFrame, path: str, partition_cols: Optional[List[str]] = None) -> None:
+        """
+        Save a Pandas DataFrame to a Parquet file, or to a partitioned Parquet dataset.
+
+        Parquet stores the schema together with the typed columnar data, so the column data types are preserved
+        natively and no dtype header is needed, unlike `to_csv`. The file is compressed with zstd.
+
+        :param df: Input DataFrame to be saved to a Parquet file.
+        :param path: File path where the Parquet file will be saved. With `partition_cols`, the root directory of the
+            dataset, which is replaced for the partitions being written.
+        :param partition_cols: Columns to partition the dataset by, each value getting its own sub-directory
+            (eg `Pollster=Bardi University/`). Defaults to None, for a single file.
+        :return: None
+        """
+        if partition_cols is None:
+            df.to_parquet(path, engine='pyarrow', compression='zstd', index=False)
+        else:
+            df.to_parquet(path, engine='pyarrow', compression='zstd', index=False, partition_cols=partition_cols,
+                          existing_data_behavior='delete_matching')
+
+    @staticmethod
+    def read_parquet(path: str, columns: Optional[List[str]] = None,
+                     filters: Optional[List[Tuple[str, str, Any]]] = None) -> pd.DataFrame:
+        """
+        Read a Parquet file or a partitioned Parquet dataset written by `to_parquet`.
+
+        The columns are decoded directly from their binary representation, with the data types recorded in the file,
+        so there is no text parsing or type inference involved.
+
+        :param path: File path to the Parquet file, or root directory of the Parquet dataset, to be read.
+        :param columns: Columns to read, the others are skipped altogether. Defaults to None, for all columns.
+        :param filters: Row filters in the pyarrow format, eg `[('Pollster', '==', 'Bardi University')]`. Filters on
+            the partition columns skip the other partitions without opening their files. Defaults to None.
+        :return: DataFrame containing the data from the Parquet file.
+        """
+        return pd.read_parquet(path, engine='pyarrow', columns=columns, filters=filters)
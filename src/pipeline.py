@@ -28,18 +28,43 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
+import re
+import sys
 from joblib import Parallel, delayed, cpu_count
-from typing import Callable, Any, List, Union, Tuple, Type
+from typing import Callable, Any, List, Union, Tuple, Type, TextIO
 from functools import wraps
 from socket import gethostname
-from io import StringIO
+from io import StringIO, TextIOBase
 from contextlib import redirect_stdout
-from sys import settrace
-from math import floor, log
-from timeit import default_timer as timer
+from sys import setprofile
+from math import floor, log10
+from time import perf_counter_ns
 
-production_servers = [...]
-development_servers = [...]
+production_servers = frozenset([...])
+development_servers = frozenset([...])
+
+# The hostname does not change during the lifetime of the process: look it up once, not on every decorated call
+_HOST = gethostname()
+_IS_PROD = _HOST in production_servers
+_IS_DEV = _HOST in development_servers
+
+# Values of the `deploy` keyword argument accepted by @deployable
+_production_aliases = frozenset({'production', 'prod'})
+_development_aliases = frozenset({'development', 'dev'})
+_skip_aliases = frozenset({'skip', 'none'})
+
+# Messages printed when skipping a decorated function, formatted once
+_inactive_message = '\N{NO ENTRY}| Skipping function decorated with @inactive...\n'
+_production_message = ('\N{FACTORY} | This host is not a production server, skipping function decorated with '
+                       '@production...\n')
+_development_message = ('\N{HAMMER AND WRENCH} | This host is a production server, skipping function decorated with '
+                        '@development...\n')
+_skip_production_message = '\N{FACTORY} | This host is not a production server, skipping...\n'
+_skip_development_message = '\N{HAMMER AND WRENCH} | This host is not a development server, skipping...\n'
+_skip_message = 'Skipping...\n'
+
+# Largest number of repetitions for which @repeat writes out the calls instead of looping
+_max_unrolled_repeats = 8
 
 
 def measure(func: Callable) -> Callable:
@@ -66,13 +91,14 @@ def measure(func: Callable) -> Callable:
     @wraps(func)
     def inner(*args, **kwargs) -> Any:
         print(f"\N{STOPWATCH} | Calling {func.__name__}()")
-        start = timer()
+        # Integer nanoseconds from the clock, converted to seconds only for display
+        start = perf_counter_ns()
 
         # The function to be executed
         func(*args, **kwargs)
 
-        elapsed_sec = timer() - start
-        print(f"\N{STOPWATCH} | Done: {func.__name__}() took {elapsed_sec:.4f} sec")
+        elapsed_ns = perf_counter_ns() - start
+        print(f"\N{STOPWATCH} | Done: {func.__name__}() took {elapsed_ns / 1e9:.4f} sec")
 
     return inner
 
@@ -97,10 +123,20 @@ def repeat(n: int = 1) -> Callable:
     """
 
     def decorator(func: Callable) -> Callable:
+
+        if n <= _max_unrolled_repeats:
+            # Generate a wrapper with the n calls written out, to skip the loop overhead for the common small n
+            namespace = {'func': func}
+            exec('def inner(*args, **kwargs):\n' + '    func(*args, **kwargs)\n' * n + '    return None\n', namespace)
+            return wraps(func)(namespace['inner'])
+
+        @wraps(func)
         def inner(*args, **kwargs) -> Any:
+            # Hoist the function from the closure cell into a local
+            f = func
             for _ in range(n):
                 # The function to be executed
-                func(*args, **kwargs)
+                f(*args, **kwargs)
 
         return inner
 
@@ -110,7 +146,8 @@ def repeat(n: int = 1) -> Callable:
 def parallel(func: Union[Callable, None] = None,
              args: Union[Tuple, List] = (),
              merge_func: Callable[[List[Any]], Any] = lambda x: x,
-             parallelism: int = cpu_count()) -> Callable:
+             parallelism: int = cpu_count(),
+             prefer: Union[str, None] = None) -> Callable:
     """
     Decorator for parallel execution of a function.
 
@@ -121,6 +158,9 @@ def parallel(func: Union[Callable, None] = None,
     :param args: Arguments to be passed to the decorated function.
     :param merge_func: A function to merge the results of parallel executions (default is identity function).
     :param parallelism: The number of parallel executions (default is the number of CPU cores).
+    :param prefer: Soft hint for the joblib backend, 'processes' or 'threads' (default is None, for the joblib
+        default). Threads avoid the start-up and pickling costs of worker processes, and suit functions that release
+        the GIL, such as NumPy or I/O bound work.
 
     :return: Decorated function that executes in parallel and merges results.
 
@@ -131,13 +171,27 @@ def parallel(func: Union[Callable, None] = None,
             return x * x
 
         result = square(5)  # Calls square(5) in parallel 4 times and merges the results.
+
+        @parallel(parallelism=4, prefer='threads')
+        def load(path):
+            return np.load(path)
         ```
     """
     def decorator(func: Callable) -> Callable:
 
+        @wraps(func)
         def inner(*args, **kwargs) -> Union[None, Any]:
 
-            results = Parallel(n_jobs=parallelism)(delayed(func)(*args, **kwargs) for i in range(parallelism))
+            if parallelism == 1:
+                # A single execution does not need a pool of workers
+                return merge_func([func(*args, **kwargs)])
+
+            # A `Parallel` instance is not reentrant, so each call gets its own: concurrent or nested calls of the
+            # decorated function would otherwise share it. The worker pool is still reused by joblib between calls.
+            # There is exactly one task per worker, all with the same arguments, so they are dispatched up front in
+            # batches of one, like a map over the workers.
+            results = Parallel(n_jobs=parallelism, prefer=prefer, batch_size=1, pre_dispatch='all')(
+                delayed(func)(*args, **kwargs) for i in range(parallelism))
             return merge_func(results)
 
         return inner
@@ -173,10 +227,10 @@ def production(func: Callable) -> Callable:
         ```
     """
     def inner(*args, **kwargs) -> Union[None, Any]:
-        if gethostname() in production_servers:
+        if _IS_PROD:
             return func(*args, **kwargs)
         else:
-            print('\N{FACTORY} | This host is not a production server, skipping function decorated with @production...')
+            sys.stdout.write(_production_message)
 
     return inner
 
@@ -204,11 +258,10 @@ def development(func: Callable) -> Callable:
         ```
     """
     def inner(*args, **kwargs) -> Union[None, Any]:
-        if gethostname() not in production_servers:
+        if not _IS_PROD:
             return func(*args, **kwargs)
         else:
-            print('\N{HAMMER AND WRENCH} | This host is a production server, skipping function decorated with '
-                  '@development...')
+            sys.stdout.write(_development_message)
 
     return inner
 
@@ -234,10 +287,18 @@ def inactive(func: Callable) -> Callable:
         deprecated_function()  # Skip execution, print a message.
         ```
     """
-    def inner(*args, **kwargs) -> None:
-        print('\N{NO ENTRY}| Skipping function decorated with @inactive...')
+    # The replacement ignores the decorated function entirely, so all inactive functions share it
+    return _inactive_inner
 
-    return inner
+
+def _inactive_inner(*args, **kwargs) -> None:
+    """
+    Replacement for the functions decorated with @inactive: print a message, unless Python runs with -O.
+
+    :return: None
+    """
+    if __debug__:
+        sys.stdout.write(_inactive_message)
 
 
 def deployable(func: Callable) -> Callable:
@@ -268,24 +329,78 @@ def deployable(func: Callable) -> Callable:
         # Skip deployment
         deployable_function(deploy='skip')
         ```
+
+    When the environment is known in advance, `deployable.for_` decides once, at decoration time.
     """
     def inner(*args, **kwargs) -> Union[None, Any]:
-        if 'deploy' in kwargs:
-            if kwargs['deploy'].lower() in ['production', 'prod'] and gethostname() not in production_servers:
-                print('\N{FACTORY} | This host is not a production server, skipping...')
+        # Popped, to avoid func() throwing an unexpected keyword exception
+        deploy = kwargs.pop('deploy', None)
+        if deploy is not None:
+            deploy = deploy.lower()
+            if deploy in _production_aliases and not _IS_PROD:
+                sys.stdout.write(_skip_production_message)
                 return
-            if kwargs['deploy'].lower() in ['development', 'dev'] and gethostname() not in development_servers:
-                print('\N{HAMMER AND WRENCH} | This host is not a development server, skipping...')
+            if deploy in _development_aliases and not _IS_DEV:
+                sys.stdout.write(_skip_development_message)
                 return
-            if kwargs['deploy'].lower() in ['skip', 'none']:
-                print('Skipping...')
+            if deploy in _skip_aliases:
+                sys.stdout.write(_skip_message)
                 return
-            del kwargs['deploy']  # to avoid func() throwing an unexpected keyword exception
         return func(*args, **kwargs)
 
     return inner
 
 
+def _deployable_for(deploy: str) -> Callable:
+    """
+    Decorator to pin the deployment environment of a function at decoration time, available as `deployable.for_`.
+
+    Unlike @deployable, which checks the 'deploy' keyword argument on every call, the decision is made once when the
+    function is decorated: if it is to run on this host, the function itself is returned, with no wrapper at all;
+    otherwise, it is replaced by a stub that prints a skip message.
+
+    :param deploy: The deployment environment, one of 'production' ('prod'), 'development' ('dev') or 'skip' ('none').
+    :return: Decorator returning the function itself, or a skipping stub.
+    :raises ValueError: If the deployment environment is not recognised.
+
+    Example usage:
+        ```python
+        @deployable.for_('production')
+        def production_task():
+            # Runs with no overhead on production servers, skipped elsewhere
+            pass
+
+        production_task()
+        ```
+    """
+    deploy = deploy.lower()
+
+    if deploy in _production_aliases:
+        message = None if _IS_PROD else _skip_production_message
+    elif deploy in _development_aliases:
+        message = None if _IS_DEV else _skip_development_message
+    elif deploy in _skip_aliases:
+        message = _skip_message
+    else:
+        raise ValueError(f"Deployment environment {deploy!r} not recognised. Choose from "
+                         f"{sorted(_production_aliases | _development_aliases | _skip_aliases)}.")
+
+    def decorator(func: Callable) -> Callable:
+        if message is None:
+            return func
+
+        @wraps(func)
+        def skip(*args, **kwargs) -> None:
+            sys.stdout.write(message)
+
+        return skip
+
+    return decorator
+
+
+deployable.for_ = _deployable_for
+
+
 def redirect(func: Union[Callable, None] = None, line_print: Union[Callable, None] = None) -> Callable:
     """
     Decorator to redirect function output and optionally print specific lines.
@@ -319,18 +434,21 @@ def redirect(func: Union[Callable, None] = None, line_print: Union[Callable, Non
 
         def inner(*args, **kwargs) -> None:
 
+            if line_print is not None:
+                # Stream the lines to line_print as they are written, without holding the whole output in memory
+                with _LineWriter(line_print, sys.stdout) as writer, redirect_stdout(writer):
+                    func(*args, **kwargs)
+                return
+
+            # The numbering width depends on the number of lines, so the whole output is needed first
             with StringIO() as buf, redirect_stdout(buf):
                 func(*args, **kwargs)
                 output = buf.getvalue()
             lines = output.splitlines()
-            if line_print is not None:
-                for line in lines:
-                    line_print(line)
-            else:
-                width = floor(log(len(lines), 10)) + 1
-                for i, line in enumerate(lines):
-                    i += 1
-                    print(f'{i:0{width}}: {line}')
+            if not lines:
+                return
+            width = floor(log10(len(lines))) + 1
+            sys.stdout.write('\n'.join(f'{i:0{width}}: {line}' for i, line in enumerate(lines, 1)) + '\n')
 
         return inner
 
@@ -342,6 +460,74 @@ def redirect(func: Union[Callable, None] = None, line_print: Union[Callable, Non
         return decorator(func)
 
 
+class _LineWriter(TextIOBase):
+
+    def __init__(self, line_print: Callable[[str], Any], stdout: TextIO) -> None:
+        """
+        Text stream that splits what is written to it into lines and passes each complete line to `line_print`, used
+        by @redirect.
+
+        :param line_print: Function called on each line, without the line break.
+        :param stdout: The standard output to restore while `line_print` runs, so it can print.
+        """
+        self.line_print = line_print
+        self.stdout = stdout
+        self.pending = ''
+
+    def writable(self) -> bool:
+        """
+        :return: True, the stream can be written to.
+        """
+        return True
+
+    def write(self, s: str) -> int:
+        """
+        Pass the lines completed by `s` to `line_print`, and keep the last one if it is not complete yet.
+
+        :param s: The text written.
+        :return: The number of characters written.
+        """
+        lines = (self.pending + s).splitlines(keepends=True)
+        stripped = [line.splitlines()[0] for line in lines]
+
+        # A last line that is not terminated by a line break waits for the next write
+        self.pending = ''
+        if lines and lines[-1] == stripped[-1]:
+            self.pending = lines.pop()
+            stripped.pop()
+
+        self.emit(stripped)
+        return len(s)
+
+    def emit(self, lines: List[str]) -> None:
+        """
+        Pass lines to `line_print`, with the standard output restored.
+
+        :param lines: The lines, without line breaks.
+        :return: None
+        """
+        if not lines:
+            return
+        if self.line_print is print:
+            # Same output as printing line by line, in a single write
+            self.stdout.write('\n'.join(lines) + '\n')
+            return
+        with redirect_stdout(self.stdout):
+            for line in lines:
+                self.line_print(line)
+
+    def close(self) -> None:
+        """
+        Pass the last line to `line_print`, even if it is not terminated by a line break, and close the stream.
+
+        :return: None
+        """
+        if self.pending:
+            self.emit([self.pending])
+            self.pending = ''
+        super().close()
+
+
 def stacktrace(func: Callable = None, exclude_files: List[str] = ['anaconda']) -> Callable:
     """
     Decorator to trace function calls and returns, optionally excluding specific files.
@@ -371,31 +557,39 @@ def stacktrace(func: Callable = None, exclude_files: List[str] = ['anaconda']) -
         custom_trace_function()  # Trace the function's calls and returns without excluding files.
         ```
     """
-    def tracer_func(frame, event, arg) -> Union[None, Any]:
+    # One precompiled pattern replaces the scan over the excluded files on every event
+    exclude_pattern = re.compile('|'.join(map(re.escape, exclude_files))) if exclude_files else None
+
+    def tracer_func(frame, event, arg) -> None:
+        # The profiler also reports calls into C functions, which are not traced
+        if event not in ('call', 'return'):
+            return
         co = frame.f_code
         func_name = co.co_name
-        caller_filename = frame.f_back.f_code.co_filename
         if func_name == 'write':
             return  # ignore write() calls from print statements
-        for file in exclude_files:
-            if file in caller_filename:
-                return  # ignore in ipython notebooks
-        args = str(tuple([frame.f_locals[arg] for arg in frame.f_code.co_varnames]))
-        if args.endswith(',)'):
-            args = args[:-2] + ')'
+        caller = frame.f_back
+        if caller is not None and exclude_pattern is not None and exclude_pattern.search(caller.f_code.co_filename):
+            return  # ignore in ipython notebooks
         if event == 'call':
+            # Only the arguments are bound on call, and the locals are only materialised for call events
+            f_locals = frame.f_locals
+            args = str(tuple([f_locals[arg] for arg in co.co_varnames[:co.co_argcount + co.co_kwonlyargcount]]))
+            if args.endswith(',)'):
+                args = args[:-2] + ')'
             print(f'--> Executing: {func_name}{args}')
-            return tracer_func
-        elif event == 'return':
-            print(f'--> Returning: {func_name}{args} -> {repr(arg)}')
-        return
+        else:
+            print(f'--> Returning: {func_name} -> {repr(arg)}')
 
     def decorator(func: Callable) -> Callable:
 
         def inner(*args, **kwargs) -> None:
-            settrace(tracer_func)
-            func(*args, **kwargs)
-            settrace(None)
+            # The profiler fires on calls and returns only, not on every line like a trace function
+            setprofile(tracer_func)
+            try:
+                func(*args, **kwargs)
+            finally:
+                setprofile(None)
 
         return inner
 
@@ -412,7 +606,8 @@ def traceclass(cls: Type) -> Type:
     Decorator to trace method executions within a class.
 
     This decorator function allows you to trace the executions of all methods within a class. It prints information about
-    the executed methods and their arguments.
+    the executed methods and their arguments. Special methods (eg `__init__`, `__repr__`), static methods and class
+    methods are not traced.
 
     :param cls: The class to be decorated.
 
@@ -423,6 +618,7 @@ def traceclass(cls: Type) -> Type:
         @traceclass
         class TracedClass:
             def __init__(self):
+                # Special methods like __init__ are not traced
                 pass
 
             def traced_method(self):
@@ -435,16 +631,24 @@ def traceclass(cls: Type) -> Type:
     """
     def make_traced(cls: Type, method_name: str, method: Callable) -> Callable:
 
+        # The message is the same on every call, so it is formatted once here
+        message = f'--> Executing: {cls.__name__}::{method_name}()\n'
+
+        @wraps(method)
         def traced_method(*args, **kwargs) -> Any:
 
-            print(f'--> Executing: {cls.__name__}::{method_name}()')
+            sys.stdout.write(message)
             return method(*args, **kwargs)
 
         return traced_method
 
-    for name in cls.__dict__.keys():
+    for name, attribute in list(cls.__dict__.items()):
+
+        # Special methods are skipped, since they are mostly called implicitly, and so are static and class methods,
+        # which are descriptors and not plain methods
+        if name.startswith('__') or isinstance(attribute, (staticmethod, classmethod)) or not callable(attribute):
+            continue
 
-        if callable(getattr(cls, name)) and name != '__class__':
-            setattr(cls, name, make_traced(cls, name, getattr(cls, name)))
+        setattr(cls, name, make_traced(cls, name, attribute))
 
     return cls
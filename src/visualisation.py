@@ -30,11 +30,25 @@ THE SOFTWARE.
 """
 import numpy as np
 import os.path
-from typing import Tuple
-from matplotlib import pyplot as plt
+from functools import lru_cache
+from typing import Tuple, Dict, Any, Optional
+from matplotlib import pyplot as plt, rc_params_from_file
 import matplotlib.dates as mdates
+import matplotlib.ticker as ticker
+from matplotlib.lines import Line2D
 
-from .configuration import cfg_paths
+from .configuration import get_cfg_paths
+
+
+@lru_cache(maxsize=None)
+def _load_style(path: str) -> Dict[str, Any]:
+    """
+    Read and parse a matplotlib style file, once per process.
+
+    :param path: File path of the .mplstyle file.
+    :return: Dictionary of the rcParams set in the style file.
+    """
+    return dict(rc_params_from_file(path, use_default_template=False))
 
 
 class PlotTimeSeries:
@@ -81,16 +95,24 @@ class PlotTimeSeries:
     """
     mplstyle: str = 'economist_xyplot.mplstyle'
 
-    def __init__(self, **kwargs):
+    # zlib level for the PNG files written by `savefig`, faster to encode than the default 6 for larger files
+    png_compress_level: Optional[int] = 3
+
+    def __init__(self, date_range: Optional[Tuple[Any, Any]] = None, **kwargs):
         """
         Initialize a PlotTimeSeries object.
 
+        The figure is created with the current Matplotlib backend, which is chosen by the application (eg 'Agg' when the
+        figures are only saved to file) and not switched here, since switching closes all the open figures.
+
+        :param date_range: The (start, end) dates of the time series, if known in advance. See `set_ticks`.
         :param kwargs: Additional keyword arguments to pass to the plt.subplots function.
         """
-        plt.style.use(os.path.join(cfg_paths.mplstyles, self.mplstyle))
+        # The style file is parsed on the first figure only, the next ones reuse the parameters
+        plt.style.use(_load_style(os.path.join(get_cfg_paths().mplstyles, self.mplstyle)))
 
         self.fig, self.axes = plt.subplots(**kwargs)
-        self.set_ticks()
+        self.set_ticks(date_range=date_range)
 
     def get_panels(self) -> Tuple[plt.Figure, plt.Axes]:
         """
@@ -100,12 +122,16 @@ class PlotTimeSeries:
         """
         return self.fig, self.axes
 
-    def set_ticks(self, years_pad: float = 7.5, labelsize: int = 10) -> None:
+    def set_ticks(self, years_pad: Optional[float] = 7.5, labelsize: int = 10,
+                  date_range: Optional[Tuple[Any, Any]] = None) -> None:
         """
         Set custom tick parameters for the plot.
 
-        :param years_pad: Padding for the years axis.
+        :param years_pad: Padding for the years axis. If None, the secondary x-axis showing the years is not created.
+            It is also skipped if `date_range` is given and does not contain the start of a year.
         :param labelsize: Tick label font size.
+        :param date_range: The (start, end) dates of the time series. If given, the year ticks are placed once from
+            a precomputed array of the year boundaries, instead of being searched for by a YearLocator on every draw.
         :return: None
         """
         # Reformat y-axis tick labels
@@ -121,20 +147,41 @@ class PlotTimeSeries:
         fmt_month = mdates.MonthLocator()
 
         # Minor ticks every year
-        fmt_year = mdates.YearLocator()
+        if date_range is None:
+            fmt_year = mdates.YearLocator()
+        else:
+            # First day of every year in the range, converted to matplotlib dates in one go
+            start, end = date_range
+            years = np.arange(np.datetime64(start, 'Y'), np.datetime64(end, 'Y') + 1)
+            year_ticks = mdates.date2num(years.astype('datetime64[D]'))
+            fmt_year = ticker.FixedLocator(year_ticks)
+
+        # '%b' to get the names of the month, for both the minor and major ticks of this axis
+        fmt_month_name = mdates.DateFormatter('%b')
 
         self.axes.xaxis.set_minor_locator(fmt_month)
-        # '%b' to get the names of the month
-        self.axes.xaxis.set_minor_formatter(mdates.DateFormatter('%b'))
+        self.axes.xaxis.set_minor_formatter(fmt_month_name)
         self.axes.xaxis.set_major_locator(fmt_year)
-        self.axes.xaxis.set_major_formatter(mdates.DateFormatter('%b'))
+        self.axes.xaxis.set_major_formatter(fmt_month_name)
 
         # Fontsize for month labels
         self.axes.tick_params(labelsize=labelsize, which='both')
 
-        # Create a second x-axis beneath the first x-axis to show the year in YYYY format
+        if years_pad is None:
+            return
+
+        if date_range is not None:
+            # The year labels sit on the first day of each year: skip the second axis if none is within the range
+            start, end = np.datetime64(date_range[0], 'D'), np.datetime64(date_range[1], 'D')
+            year_starts = years.astype('datetime64[D]')
+            if not np.any((year_starts >= start) & (year_starts <= end)):
+                return
+
+        # Create a second x-axis beneath the first x-axis to show the year in YYYY format. Locators are bound to the
+        # axis they are set on, so the second axis gets its own.
         sec_xaxis = self.axes.secondary_xaxis(-years_pad / 100.)
-        sec_xaxis.xaxis.set_major_locator(fmt_year)
+        sec_xaxis.xaxis.set_major_locator(mdates.YearLocator() if date_range is None else
+                                          ticker.FixedLocator(year_ticks))
         sec_xaxis.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
 
         # Hide the second x-axis spines and ticks
@@ -153,6 +200,12 @@ class PlotTimeSeries:
         """
         # Get the bounds [start(x), start(y), width, height] of the Axes canvas in Figure coordinates
         x0, y0, w, h = self.axes.get_position().bounds
+        fig_width, fig_height = self.fig.get_size_inches()
+
+        renderer = self.fig.canvas.get_renderer()
+
+        # Transform from display to Figure coordinates, built once for both text boxes
+        display_to_figure = self.fig.transFigure.inverted()
 
         # Increment the top anchor to get position of the subtitle
         y0 += h * (1. + hspace)
@@ -160,9 +213,8 @@ class PlotTimeSeries:
         # Start from the subtitle
         # Instead of using Axes.text(..., transform=fig.transFigure), we directly use Figure.text(...)
         t = self.fig.text(x=x0, y=y0, s=subtitle, ha='left', va='bottom', fontsize=11, alpha=.8)
-        renderer = self.fig.canvas.get_renderer()
-        bb = t.get_window_extent(renderer=renderer).transformed(self.fig.transFigure.inverted())
-        height = bb.height
+
+        height = t.get_window_extent(renderer=renderer).transformed(display_to_figure).height
 
         # Increment again and work way up to the title
         y0 += height + h * hspace
@@ -170,23 +222,24 @@ class PlotTimeSeries:
         # Add in title and subtitle
         t = self.fig.text(x=x0, y=y0, s=title, ha='left', fontsize=13, weight='bold', alpha=.8)
 
-        bb = t.get_window_extent(renderer=renderer).transformed(self.fig.transFigure.inverted())
-        height = bb.height
+        height = t.get_window_extent(renderer=renderer).transformed(display_to_figure).height
 
         # Increment further to get the location of the top red patch
         y0 += height + h * hspace
 
         # Then headline graphics
-        aspect_fig = np.divide(*self.fig.get_size_inches())
-        patch_aspect_factor = aspect_fig / self.fig.dpi / patch_aspect
+        # Scalar arithmetic on plain floats, no need for a NumPy call on the two-element size array
+        patch_aspect_factor = float(fig_width) / float(fig_height) / self.fig.dpi / patch_aspect
 
+        # The head graphics are in Figure coordinates, so they are added to the Figure directly, without going
+        # through the data limits and transforms bookkeeping of the Axes
         # Plot line next to the red rectangle
-        self.axes.plot([x0, x0 + w],  # Set width of line
-                       [y0] * 2,  # Set height of line
-                       transform=self.fig.transFigure,  # Set location relative to plot
-                       clip_on=False,
-                       color='#E3120B',
-                       linewidth=1)
+        self.fig.add_artist(Line2D([x0, x0 + w],  # Set width of line
+                                   [y0] * 2,  # Set height of line
+                                   transform=self.fig.transFigure,  # Set location relative to plot
+                                   clip_on=False,
+                                   color='#E3120B',
+                                   linewidth=1))
 
         # Instantiate the red rectangle at the top
         top_patch = plt.Rectangle((x0, y0),  # Set location of rectangle by lower left corner
@@ -196,7 +249,7 @@ class PlotTimeSeries:
                                   transform=self.fig.transFigure,
                                   clip_on=False,
                                   linewidth=0)
-        self.axes.add_patch(top_patch)
+        self.fig.add_artist(top_patch)
 
     def set_source(self, source: str, pad: float = 0.13) -> None:
         """
@@ -216,10 +269,24 @@ class PlotTimeSeries:
         Save the plot as an image file.
 
         :param filename: The name of the output image file.
-        :param kwargs: Additional keyword arguments to pass to plt.savefig.
+        :param kwargs: Additional keyword arguments to pass to plt.savefig. With `bbox_inches='tight'`, the tight
+            bounding box is measured once, and not in a separate print pass. PNG files are compressed with
+            `png_compress_level`, unless `pil_kwargs` are given.
         :return: None
         """
-        savefig_path = os.path.join(cfg_paths.reports, filename)
+        savefig_path = os.path.join(get_cfg_paths().reports, filename)
         print(f"Figure {filename:s} saved in reports directory.")
 
+        pad_inches = kwargs.get('pad_inches', plt.rcParams['savefig.pad_inches'])
+        if kwargs.get('bbox_inches') == 'tight' and not isinstance(pad_inches, str):
+            # With 'tight', savefig runs an extra pass through the print method only to measure the figure. The same
+            # bounding box is computed here from the renderer of the canvas, and passed explicitly.
+            renderer = self.fig.canvas.get_renderer()
+            tight_bbox = self.fig.get_tightbbox(renderer, bbox_extra_artists=kwargs.get('bbox_extra_artists'))
+            kwargs['bbox_inches'] = tight_bbox.padded(pad_inches)
+
+        is_png = kwargs.get('format', os.path.splitext(filename)[1].lstrip('.')).lower() == 'png'
+        if is_png and self.png_compress_level is not None and 'pil_kwargs' not in kwargs:
+            kwargs['pil_kwargs'] = {'compress_level': self.png_compress_level}
+
         self.fig.savefig(savefig_path, **kwargs)
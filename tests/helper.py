@@ -32,38 +32,75 @@ THE SOFTWARE.
 Contains helper functions for the test routines.
 """
 
-import subprocess
 import os
-from typing import Callable, Any
+import shutil
+import warnings
+from urllib.request import urlopen
+from typing import Callable, Any, Optional, Set
 
 webstorage_location: str = "http://<remote:database>/"
 test_data_location: str = "test_data/"
 
 
-def requires(filename: str) -> Callable:
+# Names of the files in the test data directory, listed once (see `get_present_files`)
+_present_files: Optional[Set[str]] = None
+
+
+def get_present_files() -> Set[str]:
     """
-    Use this as a decorator around tests that require data.
+    Get the names of the files in the test data directory, creating the directory if needed.
+
+    The directory is listed once, with a single `os.listdir`, and the set is then updated as files are downloaded,
+    so checking for a file does not need a `stat` call every time.
+
+    :return: Set of the file names in the test data directory.
+    """
+    global _present_files
+
+    if _present_files is None:
+        try:
+            _present_files = set(os.listdir(test_data_location))
+
+        except FileNotFoundError:
+            os.makedirs(test_data_location, exist_ok=True)
+            _present_files = set()
+
+    return _present_files
+
+
+def download(filename: str) -> bool:
     """
+    Download a test data file from the web storage, unless it is already in the test data directory.
 
-    # First check if the test data directory exists
-    if not os.path.exists(test_data_location):
-        os.mkdir(test_data_location)
+    :param filename: Name of the file, in the web storage and in the test data directory.
+    :return: True if the file is available, False if the download failed.
+    """
+    if filename in get_present_files():
+        return True
 
     file_location = f"{test_data_location}{filename}"
 
-    if os.path.exists(file_location):
-        ret = 0
-    else:
-        # Download it!
-        ret = subprocess.call(
-            ["wget", f"{webstorage_location}{filename}", "-O", file_location]
-        )
+    # Download it! Streamed to disk in-process, without spawning a wget subprocess per file.
+    try:
+        with urlopen(f"{webstorage_location}{filename}") as response, open(file_location, 'wb') as file:
+            shutil.copyfileobj(response, file, length=1 << 20)
+        _present_files.add(filename)
+        return True
+
+    except Exception:
+        # It may have written an empty file, kill it.
+        if os.path.exists(file_location):
+            os.remove(file_location)
 
-    if ret != 0:
-        Warning(f"Unable to download file at {filename}")
+        return False
 
-        # It wrote an empty file, kill it.
-        subprocess.call(["rm", file_location])
+
+def requires(filename: str) -> Callable:
+    """
+    Use this as a decorator around tests that require data.
+    """
+    if not download(filename):
+        warnings.warn(f"Unable to download file at {filename}", UserWarning)
 
         def dont_call_test(func: Callable) -> Callable:
 
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""
+@Author:              Edoardo Altamura
+@Year:                2023
+@Email:               edoardo.altamura@outlook.com
+@Copyright:           Copyright (c) 2023 Edoardo Altamura
+@Last Modified by:    Edoardo Altamura
+@Latest release:      5 Sep 2023
+@Project:             Election predictions (Data Science with The Economist)
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+import numpy as np
+import pandas as pd
+
+from src import DataScience
+from src.data_engineering import CANDIDATES
+
+# Two pollsters with polls on different days, so that the averages combine interpolated and measured values
+two_pollsters_data: pd.DataFrame = pd.DataFrame({
+    'Date': pd.to_datetime(['2024-01-01', '2024-01-03', '2024-01-01', '2024-01-02']),
+    'Pollster': ['Pollster A', 'Pollster A', 'Pollster B', 'Pollster B'],
+    'Sample': [100, 100, 300, 300],
+    'Bulstrode': np.array([0.4, 0.5, 0.2, 0.3], dtype=np.float32),
+    'Lydgate': np.array([0.6, 0.5, 0.8, 0.7], dtype=np.float32),
+})
+
+# One pollster with two polls 40 days apart, beyond the 28-day interpolation limit
+long_gap_data: pd.DataFrame = pd.DataFrame({
+    'Date': pd.to_datetime(['2024-01-01', '2024-02-10']),
+    'Pollster': ['Pollster A', 'Pollster A'],
+    'Sample': [100, 100],
+    'Bulstrode': np.array([0.0, 0.4], dtype=np.float32),
+})
+
+# One pollster with a daily poll, so that the averages are the polls themselves
+daily_polls: np.ndarray = np.array([0.1, 0.3, 0.2, 0.5, 0.4, 0.6, 0.3, 0.2, 0.4], dtype=np.float32)
+daily_polls_data: pd.DataFrame = pd.DataFrame({
+    'Date': pd.date_range('2024-01-01', periods=len(daily_polls), freq='D'),
+    'Pollster': 'Pollster A',
+    'Sample': 100,
+    'Bulstrode': daily_polls,
+})
+
+
+def science(polls: pd.DataFrame) -> DataScience:
+    """
+    Run the data science pipeline on the given polls, keeping the splits and results in memory only.
+
+    :param polls: Cleaned polls, as returned by `DataEngineering.clean_data`. The candidates not given have no polls.
+    :return: DataScience instance, with the regularised pollster splits.
+    """
+    no_polls = {candidate: np.float32(np.nan) for candidate in CANDIDATES if candidate not in polls.columns}
+    return DataScience(polls.assign(**no_polls), save_splits=False, save_results=False)
+
+
+def test_polling_averages_two_pollsters():
+    # Sample-weighted averages over the daily grid. Pollster A is interpolated on 2 Jan, and pollster B has no poll
+    # after 2 Jan, hence only pollster A contributes on 3 Jan:
+    #   1 Jan: (0.4 * 100 + 0.2 * 300) / 400 = 0.25
+    #   2 Jan: (0.45 * 100 + 0.3 * 300) / 400 = 0.3375
+    #   3 Jan: 0.5 * 100 / 100 = 0.5
+    averages = science(two_pollsters_data).compute_polling_averages(
+        candidates=['Bulstrode', 'Lydgate'])['polling_averages']
+
+    pd.testing.assert_series_equal(averages['Date'], pd.Series(pd.date_range('2024-01-01', periods=3), name='Date'))
+    np.testing.assert_allclose(averages['Bulstrode'], [0.25, 0.3375, 0.5], rtol=1e-6)
+    np.testing.assert_allclose(averages['Lydgate'], [0.75, 0.6625, 0.5], rtol=1e-6)
+
+
+def test_interpolation_limit():
+    # Linear interpolation between the two polls, 0.01 per day, for up to 28 days after the first poll. The next days
+    # are left missing, until the second poll.
+    regularised = DataScience.regularise_time_series(long_gap_data)
+
+    expected = np.full(41, np.nan)
+    expected[:29] = 0.01 * np.arange(29)
+    expected[40] = 0.4
+
+    pd.testing.assert_index_equal(regularised.index, pd.date_range('2024-01-01', '2024-02-10', name='Date'))
+    np.testing.assert_allclose(regularised['Bulstrode'], expected, rtol=1e-6)
+    assert (regularised['Pollster'] == 'Pollster A').all()
+
+
+def test_gaussian_trends():
+    # Weekly Gaussian window with standard deviation of 3 days, normalised to a unit sum
+    weights = np.exp(-0.5 * ((np.arange(7) - 3) / 3) ** 2)
+    weights /= weights.sum()
+
+    # The first 6 days do not have a full window
+    expected = np.full(len(daily_polls), np.nan)
+    expected[6:] = [weights @ daily_polls[i - 6:i + 1] for i in range(6, len(daily_polls))]
+
+    dfs = science(daily_polls_data).compute_polling_averages(candidates=['Bulstrode'])
+
+    np.testing.assert_allclose(dfs['polling_averages']['Bulstrode'], daily_polls, rtol=1e-6)
+    np.testing.assert_allclose(dfs['trends']['Bulstrode'], expected, rtol=1e-6)
+    assert dfs['trends']['Bulstrode'].iloc[:6].isna().all()
@@ -30,23 +30,19 @@ THE SOFTWARE.
 """
 import pytest
 import pandas as pd
-from django.core.exceptions import ValidationError
 
 from src import DataEngineering
 from src.data_engineering import URL
 
 
 def validate_url(url: str):
-    try:
-        DataEngineering().validate_url(url)
-        return True
-    except ValidationError:
-        return False
+    return DataEngineering.validate_url(url)
 
 
 test_data = [
     ('https://www.google.com/', True),
-    ('https://www.googlecom', False),
+    ('https://www google.com', False),
+    ('www.google.com', False),
     ('https://www.google.com>/', False),
     (URL, True)
 ]
@@ -57,10 +53,11 @@ def test_validate_url(sample, expected_output):
     assert validate_url(sample) == expected_output
 
 
-@pytest.fixture
+@pytest.fixture(scope='module')
 def load_from_url():
     """
-    Fixtures are callables decorated with @fixture
+    Fixtures are callables decorated with @fixture. The tests only read the loaded data, so it is fetched once for the
+    whole module.
     """
     print("(Doing Local Fixture setup stuff!)")
     de = DataEngineering()
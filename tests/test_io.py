@@ -32,6 +32,7 @@ import pytest
 import pandas as pd
 import os
 import tempfile
+from io import StringIO
 
 from src import io
 
@@ -60,9 +61,10 @@ def test_to_csv_and_read_csv(temp_dir):
     _sample_columns = sample_columns.split(',')
     _sample_dtypes = sample_dtypes.split(',')
 
-    # Create a sample DataFrame
-    df = pd.DataFrame(sample_data, columns=_sample_columns)
-    df = df.astype(dict(zip(_sample_columns, _sample_dtypes)))
+    # Create a sample DataFrame, parsing the sample data with the dtypes applied in a single pass
+    df = pd.read_csv(StringIO(sample_data), header=None, names=_sample_columns,
+                     dtype={c: t for c, t in zip(_sample_columns, _sample_dtypes) if t != 'datetime64[ns]'},
+                     parse_dates=['Date'])
 
     # Specify the path where you want to save the CSV file
     csv_path = os.path.join(temp_dir, 'sample_data.csv')
@@ -75,4 +77,44 @@ def test_to_csv_and_read_csv(temp_dir):
     loaded_df = custom_io.read_csv(csv_path)
 
     # Check if the loaded DataFrame is equal to the original DataFrame
-    assert df.equals(loaded_df)
\ No newline at end of file
+    assert df.equals(loaded_df)
+
+
+def test_read_csv_single_pass_and_legacy_format(temp_dir):
+
+    df = pd.DataFrame({
+        'Date': pd.to_datetime(['2023-10-12', '2023-10-18']),
+        'Pollster': ['Bardi University', 'Bardi University'],
+        'Sample': pd.Series([683, 709], dtype='int16'),
+        'Chettam': pd.Series([0.085, None], dtype='float32'),
+    })
+
+    csv_path = os.path.join(temp_dir, 'sample_data.csv')
+    io.IO.to_csv(df, csv_path)
+
+    # The dtypes are saved next to the CSV, which contains only the header and the data
+    assert os.path.isfile(io.IO.schema_path(csv_path))
+    assert len(pd.read_csv(csv_path)) == len(df)
+    assert df.equals(io.IO.read_csv(csv_path))
+
+    # Files with the dtypes in the line after the header can still be read
+    legacy_path = os.path.join(temp_dir, 'legacy_data.csv')
+    pd.concat([pd.DataFrame([df.dtypes.to_dict()]), df], ignore_index=True).to_csv(legacy_path, index=False)
+    assert df.equals(io.IO.read_csv(legacy_path))
+
+
+def test_read_csv_keeps_object_strings(temp_dir):
+
+    # Strings that look like numbers or booleans must come back as the same strings, not as parsed values
+    df = pd.DataFrame({
+        'Code': ['001', '010', '100'],
+        'Flag': ['True', 'False', 'True'],
+        'Sample': pd.Series([683, 709, 706], dtype='int16'),
+    })
+
+    csv_path = os.path.join(temp_dir, 'sample_data.csv')
+    io.IO.to_csv(df, csv_path)
+    loaded_df = io.IO.read_csv(csv_path)
+
+    pd.testing.assert_frame_equal(df, loaded_df)
+    assert loaded_df['Code'].tolist() == ['001', '010', '100']
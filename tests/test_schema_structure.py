@@ -28,15 +28,86 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
+import os
+import copy
 import pytest
+import numpy as np
 import pandas as pd
+import pandas.testing as pdt
+from pandas.api.types import infer_dtype
 from src import DataEngineering
+from src.data_engineering import CANDIDATES
+
+
+def raw_polls(**columns) -> pd.DataFrame:
+    """
+    Build a small table with the full schema of the raw polls, as downloaded, for the cleaning tests.
+
+    The columns not given are filled with valid values: one pollster, one poll per day and the same sample size and
+    percentages for every row. The dates are distinct, so that no row is merged as a double count.
+
+    :param columns: The columns under test, as lists of raw cells. They must all have the same length.
+    :return: DataFrame with the raw polls.
+    """
+    n_rows = len(next(iter(columns.values())))
+    data = {
+        'Date': [f"01/{day:02d}/21" for day in range(1, n_rows + 1)],
+        'Pollster': ['Pollster A'] * n_rows,
+        'Sample': ['1,000'] * n_rows,
+        **{candidate: ['10%'] * n_rows for candidate in CANDIDATES},
+    }
+    data.update(columns)
+    return pd.DataFrame(data)
+
+
+# Small inputs for the cleaning tests, built once and copied by each test, since the cleaning modifies them
+missing_values_data: pd.DataFrame = raw_polls(Sample=['10', None, '20', '30'])
+percentage_data: pd.DataFrame = raw_polls(Bulstrode=['10%', '20%', '30%'])
+date_data: pd.DataFrame = raw_polls(Date=['01/01/21', '02/02/21', '03/03/21'])
+double_asterisk_data: pd.DataFrame = raw_polls(Chettam=['**', '60%', '70%'])
+
+# The first poll is answered twice: the second answer is from the alternate question, without Chettam
+double_counts_data: pd.DataFrame = raw_polls(Date=['01/01/21', '01/01/21', '01/02/21'],
+                                             Bulstrode=['30%', '35%', '40%'], Chettam=['20%', '**', '25%'])
+
+
+@pytest.fixture(scope='session')
+def loaded_data_engineering():
+    # Create an instance of the DataEngineering class and load the data, once for all the tests
+    data_engineering = DataEngineering()
+
+    if os.path.isfile(data_engineering.raw_data_file):
+        # `load_from_url` saves the table as downloaded, so the local copy stands in for the URL without network I/O
+        data_engineering.data = data_engineering.read_parquet(data_engineering.raw_data_file)
+    else:
+        data_engineering.load_from_url()
+
+    return data_engineering
 
 
 @pytest.fixture
-def data_engineering():
-    # Create an instance of the DataEngineering class for testing
-    return DataEngineering().load_from_url()
+def data_engineering(loaded_data_engineering):
+    # Each test gets its own copy of the loaded instance and data, since the tests modify them
+    data_engineering = copy.copy(loaded_data_engineering)
+    data_engineering.data = loaded_data_engineering.data.copy()
+    return data_engineering
+
+
+@pytest.fixture
+def stub_engineering():
+    # DataEngineering instance without any data loaded, for the tests that replace the data with their own small input
+    data_engineering = DataEngineering.__new__(DataEngineering)
+    data_engineering.data = pd.DataFrame()
+    return data_engineering
+
+
+@pytest.fixture(scope='session')
+def cleaned_data(loaded_data_engineering):
+    # Clean the loaded data once, for the tests that only inspect the result
+    data_engineering = copy.copy(loaded_data_engineering)
+    data_engineering.data = loaded_data_engineering.data.copy()
+    data_engineering.clean_data()
+    return data_engineering.data
 
 
 def test_empty_data_handling(data_engineering):
@@ -46,67 +117,96 @@ def test_empty_data_handling(data_engineering):
     assert not data_engineering.data.empty
 
 
-def test_cleaning_operations(data_engineering):
+def test_cleaning_operations(loaded_data_engineering, cleaned_data):
     # Test various cleaning operations on the data
-    data_engineering.clean_data()
-    assert 'Excludes overseas candidates' in data_engineering.data.columns
-    assert 'Sample' not in data_engineering.data['Sample'].str.contains('*').any()
-    assert 'Chettam' not in data_engineering.data['Chettam'].str.contains('**').any()
-    assert 'Chettam' not in data_engineering.data['Chettam'].str.contains('%').any()
-    assert 'Date' in data_engineering.data.columns
-    assert 'Pollster' in data_engineering.data.columns
+    assert {'Excludes overseas candidates', 'Date', 'Pollster'}.issubset(cleaned_data.columns)
+
+    # The '*' and '%' marks are stripped by parsing the columns to numbers
+    assert all(pd.api.types.is_float_dtype(cleaned_data[candidate]) for candidate in CANDIDATES)
+    assert pd.api.types.is_integer_dtype(cleaned_data['Sample'])
+
+    # No number is lost while parsing: every poll with a number in the raw cells of a candidate still has one once
+    # cleaned. Double counts are merged, hence the raw cells are counted once per date, pollster and sample size.
+    raw = loaded_data_engineering.data
+    raw_polls = raw.groupby(['Date', 'Pollster', 'Sample'], sort=False, dropna=False)
+    has_number = raw[CANDIDATES].apply(lambda column: column.str.contains(r'\d', na=False))
+    pdt.assert_series_equal(cleaned_data[CANDIDATES].notna().sum(),
+                            has_number.groupby(raw_polls.ngroup()).any().sum())
+
+    # The '*' on the sample sizes is kept as a flag
+    excludes_overseas = raw['Sample'].str.contains('*', regex=False, na=False).groupby(raw_polls.ngroup()).any()
+    assert cleaned_data['Excludes overseas candidates'].sum() == excludes_overseas.sum()
 
 
-def test_double_counts_handling(data_engineering):
+def test_double_counts_handling(stub_engineering):
     # Test handling of double counts
-    data_engineering.clean_data()
-    # Assuming you have a way to set Included in alternate question to True
-    data_engineering.data.loc[0, 'Included in alternate question'] = True
-    with pytest.raises(AssertionError):
-        data_engineering.clean_data()  # This should raise an AssertionError
+    stub_engineering.data = double_counts_data.copy()
+    stub_engineering.clean_data()
 
+    # The two answers to the same poll are merged into one row per date, pollster and sample size
+    assert len(stub_engineering.data) == 2
+    assert not stub_engineering.data.duplicated(['Date', 'Pollster', 'Sample']).any()
 
-def test_sorting_and_grouping(data_engineering):
-    # Test sorting and grouping of data
-    data_engineering.clean_data()
-    assert data_engineering.data['Date'].is_monotonic_increasing
-    assert data_engineering.data.groupby('Pollster').apply(lambda x: x['Date'].is_monotonic_increasing).all()
+    # The most recent answer is kept, except for Chettam which is only in the first answer
+    pdt.assert_series_equal(stub_engineering.data['Bulstrode'],
+                            pd.Series([0.35, 0.4], dtype=np.float32, name='Bulstrode'))
+    pdt.assert_series_equal(stub_engineering.data['Chettam'],
+                            pd.Series([0.2, 0.25], dtype=np.float32, name='Chettam'))
+
+
+def test_sorting_and_grouping(cleaned_data):
+    # Test sorting and grouping of data: the rows are grouped by pollster, hence the dates are only sorted within each
+    # pollster and not across the whole table. Pollster is categorical, and sorted by its codes, which follow the
+    # alphabetical order of the names.
+    assert cleaned_data['Pollster'].cat.codes.is_monotonic_increasing
+    assert cleaned_data['Pollster'].cat.categories.is_monotonic_increasing
 
+    # Vectorised check that the dates never decrease within each pollster, without a Python callback per group
+    assert (cleaned_data.groupby('Pollster', observed=True)['Date'].diff().dropna() >= pd.Timedelta(0)).all()
 
-def test_missing_values_handling(data_engineering):
+
+def test_missing_values_handling(stub_engineering):
     # Test handling of missing values
-    data_engineering.data = pd.DataFrame({'Sample': ['10', None, '20', '30']})
-    data_engineering.clean_data()
-    assert not data_engineering.data['Sample'].isna().any()
+    stub_engineering.data = missing_values_data.copy()
+    stub_engineering.clean_data()
 
+    # Missing sample sizes stay missing (NaN), while the others are parsed to numbers
+    pdt.assert_series_equal(stub_engineering.data['Sample'], pd.Series([10, None, 20, 30], name='Sample'),
+                            check_dtype=False)
 
-def test_percentage_conversion(data_engineering):
+
+def test_percentage_conversion(stub_engineering):
     # Test percentage sign conversion
-    data_engineering.data = pd.DataFrame({'Bulstrode': ['10%', '20%', '30%']})
-    data_engineering.clean_data()
-    assert (data_engineering.data['Bulstrode'] == [0.1, 0.2, 0.3]).all()
+    stub_engineering.data = percentage_data.copy()
+    stub_engineering.clean_data()
+    pdt.assert_series_equal(stub_engineering.data['Bulstrode'], pd.Series([0.1, 0.2, 0.3], name='Bulstrode'),
+                            check_dtype=False)
 
 
-def test_date_format(data_engineering):
+def test_date_format(stub_engineering):
     # Test date format conversion
-    data_engineering.data = pd.DataFrame({'Date': ['01/01/21', '02/02/21', '03/03/21']})
-    data_engineering.clean_data()
-    assert (data_engineering.data['Date'].dt.strftime('%Y-%m-%d') == ['2021-01-01', '2021-02-02', '2021-03-03']).all()
+    stub_engineering.data = date_data.copy()
+    stub_engineering.clean_data()
+    pdt.assert_series_equal(stub_engineering.data['Date'],
+                            pd.Series(pd.to_datetime(['2021-01-01', '2021-02-02', '2021-03-03']), name='Date'))
 
 
-def test_pollster_type(data_engineering):
-    # Test if 'Pollster' column is of type str
-    data_engineering.clean_data()
-    assert data_engineering.data['Pollster'].apply(type).eq(str).all()
+def test_pollster_type(cleaned_data):
+    # Test if 'Pollster' column is of type str, from the dtype metadata instead of the type of every element. For a
+    # categorical column, only the categories need checking.
+    pollster = cleaned_data['Pollster']
+    values = pollster.cat.categories if isinstance(pollster.dtype, pd.CategoricalDtype) else pollster
+    assert infer_dtype(values, skipna=False) == 'string'
 
 
-def test_double_asterisk_handling(data_engineering):
+def test_double_asterisk_handling(stub_engineering):
     # Test handling of '**' and transfer of information to the additional column
-    data_engineering.data = pd.DataFrame({'Chettam': ['**', '60%', '70%']})
-    data_engineering.clean_data()
+    stub_engineering.data = double_asterisk_data.copy()
+    stub_engineering.clean_data()
 
-    # Check if '**' is removed from the 'Chettam' column
-    assert (data_engineering.data['Chettam'] == [None, '60%', '70%']).all()
+    # Check if '**' is removed from the 'Chettam' column, which is then converted to fractions like the other candidates
+    pdt.assert_series_equal(stub_engineering.data['Chettam'],
+                            pd.Series([np.nan, 0.6, 0.7], dtype=np.float32, name='Chettam'))
 
-    # Check if 'Included in alternate question' is correctly set
-    assert (data_engineering.data['Included in alternate question'] == [True, False, False]).all()
+    # The 'Included in alternate question' flag is only used to merge the double counts, then dropped
+    assert 'Included in alternate question' not in stub_engineering.data.columns